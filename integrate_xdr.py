@@ -4,22 +4,23 @@ Production XDR Integration for Tiny Injection
 Connects AI security findings with enterprise XDR/SIEM
 """
 
-import json
 import time
 from datetime import datetime
 from typing import List, Dict, Optional
 
-from src.xdr.integration import AIXDR
+from src.xdr.forwarder import SIEMForwarder
+from src.xdr.models import Incident, XDEvent
 from src.core.hunter import AIHunter
 from src.core.real_tester import RealAITester
+from xdr_demo import AIXDR, load_attack_chain
 
 
 class ProductionXDR:
-    def __init__(self, siem_endpoint: Optional[str] = None):
+    def __init__(self, siem_endpoint: Optional[str] = None, spool_dir: str = ".cache/siem_spool"):
         self.xdr = AIXDR()
         self.siem_endpoint = siem_endpoint
-        self.buffer: List[Dict] = []
-        self.incidents: List[Dict] = []
+        self.forwarder = SIEMForwarder(siem_endpoint, spool_dir=spool_dir) if siem_endpoint else None
+        self.incidents: List[Incident] = []
 
     def process_security_scan(self, target: str, findings: List[Dict]) -> Dict:
         print(f"[XDR] Processing {len(findings)} findings")
@@ -32,21 +33,25 @@ class ProductionXDR:
 
             event = self._build_event(target, finding)
 
-            hits = self.xdr.ingest_ai_event(
-                event["event_type"],
-                event
-            ) or []
+            hits = self.xdr.ingest(XDEvent(
+                source="ai",
+                event_type=event["event_type"],
+                confidence=event["confidence"],
+                data=event
+            ))
 
             if hits:
                 new_incidents.extend(hits)
                 self.incidents.extend(hits)
 
-            self.buffer.append({
-                "source": "ai_security_scan",
-                "event": event,
-                "incidents": hits,
-                "ingested_at": datetime.utcnow().isoformat()
-            })
+            if self.forwarder:
+                # Blocks while the SIEM is behind and the spool is full
+                self.forwarder.submit({
+                    "source": "ai_security_scan",
+                    "event": event,
+                    "incidents": hits,
+                    "ingested_at": datetime.utcnow().isoformat()
+                })
 
         if not new_incidents:
             return {
@@ -56,7 +61,7 @@ class ProductionXDR:
 
         report_file = self.xdr.save_xdr_report(new_incidents)
 
-        if self.siem_endpoint:
+        if self.forwarder:
             self._send_to_siem(new_incidents)
 
         return {
@@ -66,19 +71,21 @@ class ProductionXDR:
             "recommendations": self._generate_recommendations(new_incidents)
         }
 
-    def flush_to_siem(self):
-        if not self.siem_endpoint or not self.buffer:
+    def flush_to_siem(self, timeout: Optional[float] = 30.0):
+        if not self.forwarder:
             return
 
-        payload = {
-            "sent_at": datetime.utcnow().isoformat(),
-            "records": self.buffer
-        }
+        if not self.forwarder.flush(timeout):
+            print("[XDR] SIEM flush timed out; records stay queued")
 
-        print(f"[XDR] Forwarding {len(self.buffer)} buffered records to SIEM")
-        print(json.dumps(payload, indent=2))
+        metrics = self.forwarder.metrics()
+        print(f"[XDR] SIEM: {metrics['records_sent']} records sent in {metrics['batches_sent']} batches, "
+              f"{metrics['spool_batches']} batches spooled ({metrics['spool_bytes']} bytes)")
 
-        self.buffer.clear()
+    def close(self):
+        if self.forwarder:
+            self.flush_to_siem()
+            self.forwarder.close()
 
     def _build_event(self, target: str, finding: Dict) -> Dict:
         severity = finding.get("severity", "medium")
@@ -94,25 +101,26 @@ class ProductionXDR:
             "target": target[:80]
         }
 
-    def _send_to_siem(self, incidents: List[Dict]):
-        payload = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "source": "tiny_injection_xdr",
-            "incidents": incidents,
-            "metadata": {
-                "version": "1.0",
-                "generator": "AI Security XDR"
-            }
-        }
+    def _send_to_siem(self, incidents: List[Incident]):
+        sent_at = datetime.utcnow().isoformat()
+
+        for incident in incidents:
+            self.forwarder.submit({
+                "timestamp": sent_at,
+                "source": "tiny_injection_xdr",
+                "incident": incident,
+                "metadata": {
+                    "version": "1.0",
+                    "generator": "AI Security XDR"
+                }
+            })
 
-        print(f"[XDR] Sending {len(incidents)} incidents to SIEM")
-        print(f"[XDR] Endpoint: {self.siem_endpoint}")
-        print(f"[XDR] Payload size: {len(json.dumps(payload))} bytes")
+        print(f"[XDR] Queued {len(incidents)} incidents for {self.siem_endpoint}")
 
-    def _generate_recommendations(self, incidents: List[Dict]) -> List[str]:
+    def _generate_recommendations(self, incidents: List[Incident]) -> List[str]:
         recs = []
 
-        critical = sum(1 for i in incidents if i.get("severity") == "critical")
+        critical = sum(1 for i in incidents if i.severity == "critical")
 
         if critical:
             recs.append("Immediate review of AI access controls")
@@ -173,6 +181,8 @@ class ProductionXDR:
                 print(f"[XDR] Final report: {report}")
                 print(f"[XDR] Total incidents: {len(self.incidents)}")
 
+            self.close()
+
 
 def main():
     import argparse
@@ -188,8 +198,14 @@ def main():
     xdr = ProductionXDR(siem_endpoint=args.siem)
 
     if args.test:
-        incidents = xdr.xdr.simulate_attack_chain()
-        xdr.xdr.save_xdr_report(incidents)
+        incidents = []
+        for event in load_attack_chain():
+            incidents.extend(xdr.xdr.ingest(event))
+        report = xdr.xdr.save_xdr_report(incidents)
+        print(f"[XDR] Attack chain: {len(incidents)} incidents, report {report}")
+        if xdr.forwarder and incidents:
+            xdr._send_to_siem(incidents)
+        xdr.close()
         return
 
     if args.monitor:
@@ -219,6 +235,8 @@ def main():
         for r in result["recommendations"]:
             print(f"- {r}")
 
+    xdr.close()
+
 
 if __name__ == "__main__":
     main()
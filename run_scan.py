@@ -1,12 +1,9 @@
 #!/usr/bin/env python3
 from src.core.scanner import AIScanner
+from src.attacks.payloads import load_payloads
 import json
 from datetime import datetime
 
-def load_payloads(filepath: str):
-    with open(filepath, 'r') as f:
-        return [line.strip() for line in f if line.strip()]
-
 def main():
     scanner = AIScanner()
     
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Build, startup and lookup cost of the threat-intel IOC index.
+
+    python scripts/bench_intel.py --ips 1000000 --domains 500000 --hashes 500000
+
+A synthetic feed is written to a temporary directory (not timed), compiled
+into a snapshot, reopened the way a restarted process would, and then
+queried with a mix of hits and misses.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.xdr.intel import IOCSnapshot, ThreatIntelIndex
+from src.xdr.models import XDEvent
+
+
+def random_ip(rng: random.Random) -> str:
+    return ".".join(str(rng.randrange(256)) for _ in range(4))
+
+
+def write_feed(path: str, ips: int, cidrs: int, domains: int, hashes: int, seed: int):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for _ in range(ips):
+            f.write(random_ip(rng) + "\n")
+        for _ in range(cidrs):
+            f.write(f"{random_ip(rng)}/{rng.randrange(16, 29)}\n")
+        for i in range(domains):
+            f.write(f"c2-{i}.bad{rng.randrange(1000)}.example\n")
+        for _ in range(hashes):
+            f.write(f"{rng.getrandbits(256):064x}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threat-intel IOC index benchmark")
+    parser.add_argument("--ips", type=int, default=1_000_000)
+    parser.add_argument("--cidrs", type=int, default=50_000)
+    parser.add_argument("--domains", type=int, default=500_000)
+    parser.add_argument("--hashes", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        feed = os.path.join(directory, "feed.txt")
+        snapshot = os.path.join(directory, "intel.ioc")
+        write_feed(feed, args.ips, args.cidrs, args.domains, args.hashes, args.seed)
+
+        started = time.perf_counter()
+        built = IOCSnapshot.build(snapshot, [feed])
+        print(f"[+] Built in {time.perf_counter() - started:.2f}s: {built['ipv4_ranges']} IPv4 ranges, "
+              f"{built['domains_and_hashes']} domains/hashes, {os.path.getsize(snapshot) / 1e6:.1f} MB")
+
+        started = time.perf_counter()
+        index = ThreatIntelIndex([feed], snapshot=snapshot)
+        print(f"[+] Opened existing snapshot in {(time.perf_counter() - started) * 1000:.2f}ms")
+
+        rng = random.Random(args.seed + 1)
+        events = [
+            XDEvent(source="network", event_type="connection", data={
+                "source_ip": random_ip(rng),
+                "dest_ip": random_ip(rng),
+                "url": f"https://c2-{rng.randrange(args.domains * 2)}.bad{rng.randrange(1000)}.example/x",
+                "file_hash": f"{rng.getrandbits(256):064x}",
+            })
+            for _ in range(args.lookups)
+        ]
+
+        started = time.perf_counter()
+        hits = index.enrich_many(events)
+        elapsed = time.perf_counter() - started
+        print(f"[+] Enriched {len(events)} events (4 fields each) in {elapsed:.2f}s: "
+              f"{elapsed / len(events) * 1e6:.2f}us per event, {hits} with matches")
+
+        # Ingest while a forced reload builds in a worker process
+        done = threading.Event()
+
+        def reload():
+            index.reload(force=True, isolated=True)
+            done.set()
+
+        started = time.perf_counter()
+        threading.Thread(target=reload).start()
+        enriched = 0
+        while not done.is_set():
+            index.enrich(events[enriched % len(events)])
+            enriched += 1
+        elapsed = time.perf_counter() - started
+        print(f"[*] Reload took {elapsed:.2f}s; {enriched} events enriched meanwhile "
+              f"({enriched / elapsed:,.0f}/s), {index.stats()['reloads']} reload(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import hashlib
+import re
+import struct
+from operator import eq
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from src.attacks.dedup import normalize_payload
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_DELEET = str.maketrans("1340", "ieao")
+
+
+def cluster_text(payload: str) -> str:
+    """Normalization for near-duplicate matching.
+
+    On top of the dedup normalization, punctuation is dropped and leetspeak
+    digits are mapped back to letters, so the obfuscation wrappers and
+    substitutions don't keep variants of one payload apart.
+    """
+    text = _PUNCTUATION.sub(" ", normalize_payload(payload)).translate(_DELEET)
+    return " ".join(text.split())
+
+
+class MinHashLSH:
+    """MinHash signatures over character shingles, banded for LSH.
+
+    Two payloads land in the same bucket of some band with high probability
+    once their shingle Jaccard similarity is above roughly
+    (1/bands) ** (1/rows); candidates are then confirmed against threshold
+    using the signature estimate. Clustering is linear in the number of
+    payloads plus the candidate pairs found.
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 8, shingle_size: int = 4,
+                 threshold: float = 0.6, seed: int = 1, cache_size: int = 1_000_000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self._salt = seed.to_bytes(8, "little")
+        self._format = struct.Struct(f"<{num_perm}I")
+        self._vectors: Dict[str, Tuple[int, ...]] = {}
+
+    def _vector(self, shingle: str) -> Tuple[int, ...]:
+        """num_perm independent 32-bit hashes of one shingle from a single SHAKE digest"""
+        vector = self._vectors.get(shingle)
+        if vector is None:
+            digest = hashlib.shake_128(self._salt + shingle.encode("utf-8")).digest(self._format.size)
+            vector = self._format.unpack(digest)
+            if len(self._vectors) < self.cache_size:
+                self._vectors[shingle] = vector
+        return vector
+
+    def shingles(self, payload: str) -> set:
+        text = cluster_text(payload)
+        k = self.shingle_size
+        if len(text) <= k:
+            return {text}
+        return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+    def signature(self, payload: str) -> Tuple[int, ...]:
+        # Shingles recur across payloads, so their hash vectors are cached and
+        # the per-permutation minimum is a C-level min over zipped columns
+        return tuple(map(min, zip(*map(self._vector, self.shingles(payload)))))
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(map(eq, sig_a, sig_b)) / len(sig_a)
+
+    def cluster(self, payloads: Sequence[str]) -> List[List[int]]:
+        """Group payload indexes into near-duplicate clusters.
+
+        Clusters are ordered by their first member and members keep input
+        order, so the first member is the representative.
+        """
+        signatures = [self.signature(p) for p in payloads]
+        parent = list(range(len(payloads)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        rows = self.rows
+        for band in range(self.bands):
+            start = band * rows
+            buckets: Dict[Tuple[int, ...], int] = {}
+            for i, signature in enumerate(signatures):
+                key = signature[start:start + rows]
+                head = buckets.setdefault(key, i)
+                if head == i:
+                    continue
+                root_i, root_head = find(i), find(head)
+                if root_i != root_head and self.similarity(signatures[head], signature) >= self.threshold:
+                    parent[max(root_i, root_head)] = min(root_i, root_head)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(payloads)):
+            groups.setdefault(find(i), []).append(i)
+        return sorted(groups.values(), key=lambda members: members[0])
+
+
+def cluster_payloads(payloads: Sequence[str], lsh: MinHashLSH = None) -> List[List[str]]:
+    """Near-duplicate clusters of payloads; the first of each is its representative"""
+    lsh = lsh or MinHashLSH()
+    return [[payloads[i] for i in members] for members in lsh.cluster(payloads)]
+
+
+def scan_by_cluster(payloads: Sequence[str], run: Callable[[List[str]], List[Dict]],
+                    lsh: MinHashLSH = None) -> Tuple[List[Dict], Dict]:
+    """Test one representative per cluster, then the rest of each cluster
+    whose representative produced a vulnerable finding.
+
+    run takes a list of payloads and returns findings carrying a "payload"
+    key (any number per payload, e.g. one per provider lane).
+    """
+    clusters = cluster_payloads(payloads, lsh)
+    representatives = [members[0] for members in clusters]
+    print(f"[*] {len(payloads)} payloads in {len(clusters)} clusters; testing representatives first")
+
+    results = list(run(representatives))
+    hits = {r.get("payload") for r in results if r.get("vulnerable")}
+
+    expand = [p for members in clusters if members[0] in hits for p in members[1:]]
+    if expand:
+        print(f"[*] {len(hits)} representatives succeeded; expanding to {len(expand)} cluster members")
+        results.extend(run(expand))
+
+    # run may test fewer payloads than asked (e.g. under a budget)
+    tested = {r.get("payload") for r in results} & set(payloads)
+    stats = {
+        "payloads": len(payloads),
+        "clusters": len(clusters),
+        "representatives_hit": len(hits),
+        "tested": len(tested),
+        "skipped": len(set(payloads)) - len(tested)
+    }
+    return results, stats
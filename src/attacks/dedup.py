@@ -0,0 +1,192 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from src.utils.bloom import BloomFilter
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_payload(payload: str) -> str:
+    """Canonical form for dedup: NFKC, casefolded, whitespace collapsed"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", payload).casefold()).strip()
+
+
+def payload_hash(payload: str) -> bytes:
+    """16-byte digest of the normalized payload"""
+    return hashlib.blake2b(normalize_payload(payload).encode("utf-8"), digest_size=16).digest()
+
+
+def recordable_payloads(findings: Iterable[Dict]) -> List[str]:
+    """Distinct payloads of findings that carry a real response.
+
+    Simulated findings (backend unreachable, demo verdicts) don't count as
+    tested, so they are not hidden from later runs.
+    """
+    return list(dict.fromkeys(
+        f["payload"] for f in findings if f.get("payload") and not f.get("simulated")
+    ))
+
+
+class DedupIndex:
+    """Persistent set of normalized payload hashes shared across runs.
+
+    Lookups go to SQLite in batches. With bloom=True a Bloom filter sits in
+    front: a miss there proves the payload is new without touching the
+    database, which matters once the index holds millions of hashes. The
+    filter is saved next to the database and rebuilt if it is missing or
+    stale.
+    """
+
+    def __init__(self, path: str = ".cache/payload_index.sqlite", bloom: bool = False,
+                 bloom_capacity: int = 10_000_000, error_rate: float = 0.001):
+        self.path = path
+        self.checked = 0
+        self.skipped = 0
+        self.added = 0
+        self.bloom_negatives = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " hash BLOB PRIMARY KEY, first_seen REAL NOT NULL, source TEXT) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        self.bloom: Optional[BloomFilter] = None
+        self.bloom_path = path + ".bloom"
+        if bloom:
+            self._open_bloom(bloom_capacity, error_rate)
+
+    def _open_bloom(self, capacity: int, error_rate: float):
+        rows = self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+        if os.path.exists(self.bloom_path):
+            try:
+                bloom = BloomFilter.load(self.bloom_path)
+                if bloom.count == rows and rows <= bloom.capacity:
+                    self.bloom = bloom
+                    return
+            except (OSError, ValueError):
+                pass
+
+        self.bloom = BloomFilter(max(capacity, rows * 2), error_rate)
+        for (digest,) in self._conn.execute("SELECT hash FROM seen"):
+            self.bloom.add(digest)
+
+    def _known(self, digests: Sequence[bytes]) -> set:
+        """Subset of digests already in the index"""
+        candidates = list(digests)
+        if self.bloom is not None:
+            candidates = [d for d in candidates if d in self.bloom]
+            self.bloom_negatives += len(digests) - len(candidates)
+
+        known = set()
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            known.update(row[0] for row in self._conn.execute(
+                f"SELECT hash FROM seen WHERE hash IN ({placeholders})", chunk
+            ))
+        return known
+
+    def unseen(self, items: Iterable, key: Callable = None) -> List:
+        """Items whose payload is in neither the index nor earlier in items.
+
+        Does not record anything; pass what is actually used to add_many.
+        """
+        items = list(items)
+        key = key or (lambda item: item)
+        digests = [payload_hash(key(item)) for item in items]
+
+        with self._lock:
+            known = self._known(digests)
+
+        fresh = []
+        batch_seen = set()
+        for item, digest in zip(items, digests):
+            if digest in known or digest in batch_seen:
+                continue
+            batch_seen.add(digest)
+            fresh.append(item)
+
+        self.checked += len(items)
+        self.skipped += len(items) - len(fresh)
+        return fresh
+
+    def add_many(self, payloads: Iterable[str], source: str = None) -> int:
+        now = time.time()
+        rows = [(payload_hash(p), now, source) for p in payloads]
+        if not rows:
+            return 0
+
+        with self._lock:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (hash, first_seen, source) VALUES (?, ?, ?)", rows
+            ).rowcount
+            self._conn.commit()
+            if self.bloom is not None:
+                for digest, _, _ in rows:
+                    self.bloom.add(digest)
+
+        self.added += inserted
+        return inserted
+
+    def add(self, payload: str, source: str = None) -> bool:
+        return self.add_many([payload], source) == 1
+
+    def __contains__(self, payload: str) -> bool:
+        with self._lock:
+            return bool(self._known([payload_hash(payload)]))
+
+    def filter(self, payloads: Iterable[str], source: str = None, batch_size: int = 1000):
+        """Yield only never-seen payloads, recording each one as it is yielded"""
+        batch: List[str] = []
+        for payload in payloads:
+            batch.append(payload)
+            if len(batch) >= batch_size:
+                yield from self._emit(batch, source)
+                batch = []
+        if batch:
+            yield from self._emit(batch, source)
+
+    def _emit(self, batch: List[str], source: str):
+        emitted = []
+        try:
+            for payload in self.unseen(batch):
+                emitted.append(payload)
+                yield payload
+        finally:
+            self.add_many(emitted, source)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def stats(self) -> Dict:
+        return {
+            "indexed": len(self),
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "added": self.added,
+            "bloom_negatives": self.bloom_negatives
+        }
+
+    def close(self):
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.count = self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+                self.bloom.save(self.bloom_path)
+            self._conn.close()
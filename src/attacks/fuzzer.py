@@ -0,0 +1,233 @@
+import glob
+import os
+import random
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.attacks.dedup import payload_hash
+from src.attacks.generator import PayloadGenerator
+from src.attacks.grammar import ACTION_WORDS, COMMAND_TEMPLATES, COMMANDS, QUESTIONS
+from src.attacks.payloads import load_payloads
+from src.attacks.transforms import TransformPipeline
+from src.core.analyzer import REFUSAL_PHRASES, get_analyzer
+
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+_ACTIONS = re.compile(r"\b(" + "|".join(ACTION_WORDS) + r")\b", re.IGNORECASE)
+
+
+def _join(first: str, second: str) -> str:
+    """Two payloads as consecutive sentences"""
+    first = first.rstrip()
+    if not first.endswith((".", "!", "?")):
+        first += "."
+    return f"{first} {second}"
+
+
+def load_corpora(pattern: str = "data/payloads/*.txt") -> List[str]:
+    """Distinct payloads from every corpus file matching pattern"""
+    payloads: List[str] = []
+    for path in sorted(glob.glob(pattern)):
+        if os.path.getsize(path):
+            payloads.extend(load_payloads(path))
+    return list(dict.fromkeys(payloads))
+
+
+def finding_fitness(finding: Dict, engaged: float = 0.1) -> float:
+    """Fitness of one finding: the analyzer's confidence in the response,
+    raised to the tester's own confidence when it called it vulnerable.
+
+    A response that is neither a hit nor a refusal scores engaged, which
+    gives selection something to climb before the first hit. Simulated
+    findings score 0: their verdicts say nothing about the target.
+    """
+    if finding.get("simulated"):
+        return 0.0
+    analyzer = get_analyzer()
+    response = finding.get("response") or ""
+    score = analyzer.analyze([(finding.get("payload") or "", response)])[0]["confidence"]
+    if finding.get("vulnerable"):
+        score = max(score, finding.get("confidence") or 1.0)
+    elif not score and response and not any(p in analyzer.scan_response(response) for p in REFUSAL_PHRASES):
+        score = engaged
+    return score
+
+
+class EvolutionaryFuzzer:
+    """Mutation/crossover search over payloads, scored by the target's verdicts.
+
+    The first population mixes grammar payloads with the corpora under
+    data/payloads. Every generation keeps the elite, breeds the rest by
+    tournament selection, crossover and mutation, and sends every child that
+    has no fitness yet to run() in one batch, so the tester can put the whole
+    generation in flight at once. Fitness is cached by normalized payload
+    hash, so a payload is never tested twice in a run.
+    """
+
+    def __init__(self, population: int = 20, elite: int = 4, mutation_rate: float = 0.8,
+                 crossover_rate: float = 0.5, tournament: int = 3, seed: Optional[int] = None,
+                 generator: PayloadGenerator = None, corpora: Iterable[str] = None,
+                 fitness: Callable[[Dict], float] = finding_fitness):
+        self.population = population
+        self.elite = min(elite, population)
+        self.mutation_rate = mutation_rate
+        self.crossover_rate = crossover_rate
+        self.tournament = tournament
+        self.rng = random.Random(seed)
+        self.generator = generator or PayloadGenerator(seed=self.rng.randrange(2 ** 32))
+        self.pipeline = TransformPipeline(min_steps=1, max_steps=1, rng=self.rng)
+        self.corpora = list(corpora) if corpora is not None else load_corpora()
+        self.fitness = fitness
+
+        self.scores: Dict[bytes, float] = {}
+        self.findings: List[Dict] = []
+        self.history: List[Dict] = []
+        self.cache_hits = 0
+
+        self.mutations = [
+            self._mutate_transform,
+            self._mutate_action,
+            self._mutate_append,
+            self._mutate_replace_sentence,
+        ]
+
+    def score(self, payload: str) -> Optional[float]:
+        return self.scores.get(payload_hash(payload))
+
+    def seed_population(self) -> List[str]:
+        count = self.population
+        from_corpora = self.rng.sample(self.corpora, min(len(self.corpora), count // 2))
+        population = list(dict.fromkeys(from_corpora + self.generator.generate(count)))
+        return population[:count]
+
+    # Variation operators
+
+    def _fragment(self) -> str:
+        return self.rng.choice(self.rng.choice((COMMANDS, QUESTIONS, COMMAND_TEMPLATES)))
+
+    def _mutate_transform(self, payload: str) -> str:
+        return self.pipeline.apply(payload)[0]
+
+    def _mutate_action(self, payload: str) -> str:
+        """Swap one action verb for another"""
+        matches = list(_ACTIONS.finditer(payload))
+        if not matches:
+            return self._mutate_append(payload)
+        match = self.rng.choice(matches)
+        word = self.rng.choice([w for w in ACTION_WORDS if w != match.group().lower()])
+        if match.group()[0].isupper():
+            word = word.capitalize()
+        return payload[:match.start()] + word + payload[match.end():]
+
+    def _mutate_append(self, payload: str) -> str:
+        fragment = self._fragment()
+        if self.rng.random() < 0.5:
+            return _join(fragment, payload)
+        return _join(payload, fragment)
+
+    def _mutate_replace_sentence(self, payload: str) -> str:
+        sentences = _SENTENCES.split(payload)
+        sentences[self.rng.randrange(len(sentences))] = self.generator.grammar.get(
+            self.rng.randrange(self.generator.grammar.size)
+        )
+        return " ".join(sentences)
+
+    def crossover(self, a: str, b: str) -> str:
+        """Head of a joined to the tail of b, cut at sentence boundaries when
+        both parents have several sentences and at word boundaries otherwise"""
+        parts_a, parts_b = _SENTENCES.split(a), _SENTENCES.split(b)
+        if len(parts_a) < 2 or len(parts_b) < 2:
+            parts_a, parts_b = a.split(), b.split()
+        if len(parts_a) < 2 or len(parts_b) < 2:
+            return _join(a, b)
+        head = parts_a[:self.rng.randrange(1, len(parts_a))]
+        tail = parts_b[self.rng.randrange(1, len(parts_b)):]
+        return " ".join(head + tail)
+
+    def mutate(self, payload: str) -> str:
+        return self.rng.choice(self.mutations)(payload)
+
+    def _select(self, ranked: Sequence[Tuple[float, str]]) -> str:
+        contestants = self.rng.sample(ranked, min(self.tournament, len(ranked)))
+        return max(contestants)[1]
+
+    def breed(self, ranked: Sequence[Tuple[float, str]], count: int, attempts: int = 20) -> List[str]:
+        """count children that have no fitness yet and differ from each other"""
+        children: Dict[bytes, str] = {}
+        for _ in range(count * attempts):
+            if len(children) >= count:
+                break
+            child = self._select(ranked)
+            if self.rng.random() < self.crossover_rate:
+                child = self.crossover(child, self._select(ranked))
+            if self.rng.random() < self.mutation_rate:
+                child = self.mutate(child)
+
+            key = payload_hash(child)
+            if key in self.scores:
+                self.cache_hits += 1
+            elif key not in children:
+                children[key] = child
+        return list(children.values())
+
+    # Evaluation
+
+    def evaluate(self, payloads: Sequence[str], run: Callable[[List[str]], List[Dict]]) -> int:
+        """Score every payload without a cached fitness in one call to run.
+
+        run returns findings carrying a "payload" key, any number per
+        payload (e.g. one per provider lane); a payload's fitness is its
+        best finding. Returns how many payloads were sent.
+        """
+        pending: Dict[bytes, str] = {}
+        for payload in payloads:
+            key = payload_hash(payload)
+            if key in self.scores:
+                self.cache_hits += 1
+            else:
+                pending.setdefault(key, payload)
+        if not pending:
+            return 0
+
+        findings = list(run(list(pending.values())))
+        self.findings.extend(findings)
+        for finding in findings:
+            key = payload_hash(finding.get("payload") or "")
+            if key in pending:
+                self.scores[key] = max(self.scores.get(key, 0.0), self.fitness(finding))
+
+        # Payloads the tester skipped (e.g. over budget) count as failures so
+        # they are not bred and re-sent every generation
+        for key in pending:
+            self.scores.setdefault(key, 0.0)
+        return len(pending)
+
+    def run(self, run: Callable[[List[str]], List[Dict]], generations: int = 5,
+            initial: Sequence[str] = None) -> Tuple[List[Dict], Dict]:
+        """Evolve for the given number of generations; returns (findings, stats)"""
+        population = list(initial) if initial else self.seed_population()
+        sent = self.evaluate(population, run)
+
+        for generation in range(generations + 1):
+            ranked = sorted(((self.score(p), p) for p in population), reverse=True)
+            best, mean = ranked[0][0], sum(s for s, _ in ranked) / len(ranked)
+            self.history.append({"generation": generation, "tested": sent, "best": best,
+                                 "mean": round(mean, 3)})
+            print(f"[*] Generation {generation}: {sent} tested, best {best:.2f}, mean {mean:.2f}")
+            if generation == generations:
+                break
+
+            survivors = [p for _, p in ranked[:self.elite]]
+            children = self.breed(ranked, self.population - len(survivors))
+            sent = self.evaluate(children, run)
+            population = survivors + children
+
+        ranked = sorted(((self.score(p), p) for p in population), reverse=True)
+        stats = {
+            "generations": generations,
+            "tested": len(self.scores),
+            "cache_hits": self.cache_hits,
+            "vulnerable": len({f.get("payload") for f in self.findings if f.get("vulnerable")}),
+            "best": [{"payload": p, "fitness": s} for s, p in ranked[:self.elite]],
+            "history": self.history
+        }
+        return self.findings, stats
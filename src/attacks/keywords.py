@@ -0,0 +1,63 @@
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did",
+    "will", "would", "should", "could", "can", "may", "might", "must", "shall"
+})
+
+_TOKEN = re.compile(r"[^\s.,!?;:\"'()\[\]{}]+(?:'[^\s.,!?;:\"'()\[\]{}]+)*")
+
+
+def tokenize(text: str, min_length: int = 5) -> List[str]:
+    """Lowercased words of text, minus punctuation, stop words and short words"""
+    return [w for w in _TOKEN.findall(text.lower()) if len(w) >= min_length and w not in STOP_WORDS]
+
+
+def extract_keywords(text: str, limit: int = 10) -> List[str]:
+    """Distinct keywords of a single prompt in order of appearance"""
+    return list(dict.fromkeys(tokenize(text)))[:limit]
+
+
+class KeywordIndex:
+    """TF-IDF keyword index over a corpus of system prompts.
+
+    Each prompt is tokenized once when added; document frequencies are
+    shared, so a prompt's keywords are the words that set it apart from the
+    rest of the corpus rather than boilerplate every prompt contains.
+    """
+
+    def __init__(self, prompts: Iterable[str] = ()):
+        self.documents: List[Counter] = []
+        self.df: Counter = Counter()
+        for prompt in prompts:
+            self.add(prompt)
+
+    def add(self, prompt: str) -> int:
+        """Index a prompt; returns its document id"""
+        counts = Counter(tokenize(prompt))
+        self.documents.append(counts)
+        self.df.update(counts.keys())
+        return len(self.documents) - 1
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def idf(self, term: str) -> float:
+        # Smoothed, so a term in every prompt still has a small positive weight
+        return math.log((1 + len(self.documents)) / (1 + self.df[term])) + 1.0
+
+    def scores(self, doc: int) -> List[Tuple[str, float]]:
+        """(term, tf-idf) for one prompt, best first; ties keep order of appearance"""
+        counts = self.documents[doc]
+        total = sum(counts.values()) or 1
+        idf = self.idf
+        scored = [(term, count / total * idf(term)) for term, count in counts.items()]
+        scored.sort(key=lambda item: -item[1])
+        return scored
+
+    def keywords(self, doc: int, limit: int = 10) -> List[str]:
+        return [term for term, _ in self.scores(doc)[:limit]]
@@ -0,0 +1,313 @@
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+from array import array
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.attacks.dedup import DedupIndex, payload_hash
+
+
+def load_payloads(path: str, dedup: DedupIndex = None, record: bool = True, source: str = None) -> List[str]:
+    """Non-empty lines of a payload file, or every payload of a PayloadLibrary.
+
+    With a dedup index only payloads it has never seen are returned; unless
+    record is False they are added to the index as they are loaded.
+    """
+    if PayloadLibrary.is_library(path):
+        with PayloadLibrary(path) as library:
+            payloads = list(library)
+    else:
+        with open(path, 'r') as f:
+            payloads = [line.strip() for line in f if line.strip()]
+
+    if dedup is None:
+        return payloads
+
+    fresh = dedup.unseen(payloads)
+    if record:
+        dedup.add_many(fresh, source=source or path)
+    skipped = len(payloads) - len(fresh)
+    if skipped:
+        print(f"[*] Skipped {skipped} already-seen payloads from {path}")
+    return fresh
+
+
+_MAGIC = b"PLB1"
+_HEADER = struct.Struct("<4sQQI")    # magic, count, blob bytes, metadata bytes
+_NONZERO = re.compile(rb"[^\x00]")
+
+# Fingerprints of the transforms in src/attacks/transforms.py, for corpora
+# that were saved without their transform records
+_OBFUSCATED = re.compile(
+    r"[a-z][0134][a-z]|(?:[a-z][A-Z]){3}|  |^(?:Hey, |Quick question: )| thanks!$| \.$"
+)
+
+
+def is_obfuscated(payload: str) -> bool:
+    return bool(_OBFUSCATED.search(payload))
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class PayloadLibrary:
+    """Read-only payload corpus in one memory-mapped file.
+
+    Layout after the header and JSON metadata (tag names), each section
+    8-byte aligned: count + 1 uint64 blob offsets, count float64 last-seen
+    times (0 = never), one bitmap per tag and the UTF-8 blob. Opening maps
+    the file and reads nothing else, so it takes the same time for ten
+    payloads or ten million; queries AND/OR whole bitmaps and then decode
+    only the payloads they yield.
+
+    Tags are "technique:<name>", "severity:<level>", "source:<name>",
+    "transform:<name>" and "obfuscated".
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        self._file = open(path, "r+b" if writable else "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+        magic, count, blob_size, meta_size = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"Not a payload library: {path}")
+
+        meta_start = _HEADER.size
+        self.meta = json.loads(self._mm[meta_start:meta_start + meta_size].decode("utf-8"))
+        self.tags: List[str] = self.meta["tags"]
+        self.count = count
+
+        view = memoryview(self._mm)
+        self._bitmap_size = (count + 7) // 8
+        position = _align(meta_start + meta_size)
+        self._offsets = view[position:position + (count + 1) * 8].cast("Q")
+        position += (count + 1) * 8
+        self._last_seen = view[position:position + count * 8].cast("d")
+        position += count * 8
+        self._bitmaps = {tag: (position + i * self._bitmap_size) for i, tag in enumerate(self.tags)}
+        self._blob = position + len(self.tags) * self._bitmap_size
+        self._view = view
+
+    @staticmethod
+    def is_library(path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                return f.read(len(_MAGIC)) == _MAGIC
+        except OSError:
+            return False
+
+    @classmethod
+    def build(cls, path: str, entries: Iterable[Union[str, Tuple]], source: str = None,
+              dedup: bool = True) -> Dict:
+        """Write a library from payloads, (payload, transform names) pairs or
+        (payload, transform names, source) triples.
+
+        The blob is streamed to a temporary file while offsets and tag
+        bitmaps are collected, so the corpus is never held in memory.
+        """
+        from src.core.analyzer import get_analyzer
+
+        analyzer = get_analyzer()
+        offsets = array("Q", [0])
+        bitmaps: Dict[str, bytearray] = {}
+        seen = set()
+        count = 0
+
+        def tag(name: str, index: int):
+            bitmap = bitmaps.setdefault(name, bytearray())
+            byte = index >> 3
+            if byte >= len(bitmap):
+                bitmap.extend(bytes(max(byte + 1 - len(bitmap), len(bitmap))))
+            bitmap[byte] |= 1 << (index & 7)
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.TemporaryFile(dir=directory) as blob:
+            for entry in entries:
+                if isinstance(entry, str):
+                    payload, transforms, entry_source = entry, (), source
+                else:
+                    payload, transforms, entry_source = (tuple(entry) + (source,))[:3]
+                payload = payload.strip()
+                if not payload:
+                    continue
+                if dedup:
+                    digest = payload_hash(payload)
+                    if digest in seen:
+                        continue
+                    seen.add(digest)
+
+                data = payload.encode("utf-8")
+                blob.write(data)
+                offsets.append(offsets[-1] + len(data))
+
+                technique, severity = analyzer.classify_payload(payload) or ("other", "none")
+                tag(f"technique:{technique}", count)
+                tag(f"severity:{severity}", count)
+                if entry_source:
+                    tag(f"source:{entry_source}", count)
+                for name in transforms:
+                    tag(f"transform:{name}", count)
+                if transforms or is_obfuscated(payload):
+                    tag("obfuscated", count)
+                count += 1
+
+            tags = sorted(bitmaps)
+            meta = json.dumps({"tags": tags, "created": time.time()}).encode("utf-8")
+            bitmap_size = (count + 7) // 8
+
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, count, offsets[-1], len(meta)))
+                f.write(meta)
+                f.write(bytes(_align(f.tell()) - f.tell()))
+                offsets.tofile(f)
+                f.write(bytes(count * 8))
+                for name in tags:
+                    bitmap = bitmaps[name][:bitmap_size]
+                    f.write(bitmap + bytes(bitmap_size - len(bitmap)))
+                blob.seek(0)
+                shutil.copyfileobj(blob, f, 1 << 20)
+            os.replace(tmp, path)
+
+        return {"path": path, "payloads": count, "tags": {name: cls._popcount(bitmaps[name]) for name in tags}}
+
+    @staticmethod
+    def file_entries(files: Iterable[str]) -> Iterator[Tuple[str, Tuple, str]]:
+        """Build entries for text corpora, with each file's name as the source"""
+        for name in files:
+            source = os.path.splitext(os.path.basename(name))[0]
+            with open(name, "r") as f:
+                for line in f:
+                    yield line, (), source
+
+    @classmethod
+    def from_files(cls, path: str, files: Iterable[str], dedup: bool = True) -> Dict:
+        return cls.build(path, cls.file_entries(files), dedup=dedup)
+
+    @staticmethod
+    def _popcount(bitmap: bytes) -> int:
+        return bin(int.from_bytes(bitmap, "little")).count("1")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> str:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        start = self._blob + self._offsets[index]
+        return self._mm[start:self._blob + self._offsets[index + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return self.query()
+
+    def _bitmap(self, tag: str) -> int:
+        start = self._bitmaps.get(tag)
+        if start is None:
+            return 0
+        return int.from_bytes(self._mm[start:start + self._bitmap_size], "little")
+
+    def _mask(self, filters: Dict[str, Union[None, str, Iterable[str]]], tags: Iterable[str],
+              exclude: Iterable[str]) -> int:
+        mask = (1 << self.count) - 1
+        for category, values in filters.items():
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            union = 0
+            for value in values:
+                union |= self._bitmap(f"{category}:{value}")
+            mask &= union
+        for tag in tags:
+            mask &= self._bitmap(tag)
+        for tag in exclude:
+            mask &= ~self._bitmap(tag)
+        return mask
+
+    def ids(self, technique=None, severity=None, source=None, transform=None, tags: Iterable[str] = (),
+            exclude: Iterable[str] = (), obfuscated: Optional[bool] = None,
+            not_seen_since: Optional[float] = None) -> Iterator[int]:
+        """Ids of matching payloads in library order.
+
+        technique/severity/source/transform take one value or several (any
+        of them matches); filters combine with AND. not_seen_since drops
+        payloads marked seen at or after that time.
+        """
+        tags = list(tags)
+        exclude = list(exclude)
+        if obfuscated is True:
+            tags.append("obfuscated")
+        elif obfuscated is False:
+            exclude.append("obfuscated")
+
+        mask = self._mask({"technique": technique, "severity": severity, "source": source,
+                           "transform": transform}, tags, exclude)
+        if not mask:
+            return
+        data = mask.to_bytes(self._bitmap_size, "little")
+        last_seen = self._last_seen
+
+        for match in _NONZERO.finditer(data):
+            byte = match.start()
+            bits = data[byte]
+            base = byte << 3
+            while bits:
+                low = bits & -bits
+                index = base + low.bit_length() - 1
+                bits ^= low
+                if not_seen_since is None or last_seen[index] < not_seen_since:
+                    yield index
+
+    def query(self, limit: Optional[int] = None, **filters) -> Iterator[str]:
+        """Lazily decode the payloads matching filters (see ids)"""
+        return (self[i] for i in islice(self.ids(**filters), limit))
+
+    def count_matching(self, **filters) -> int:
+        return sum(1 for _ in self.ids(**filters))
+
+    def tag_counts(self) -> Dict[str, int]:
+        return {tag: self._popcount(self._mm[start:start + self._bitmap_size])
+                for tag, start in self._bitmaps.items()}
+
+    def last_seen(self, index: int) -> float:
+        return self._last_seen[index]
+
+    def mark_seen(self, ids: Iterable[int], when: float = None):
+        """Record ids as tested at when (default now); needs writable=True"""
+        if not self.writable:
+            raise PermissionError("Library was opened read-only")
+        when = time.time() if when is None else when
+        for index in ids:
+            self._last_seen[index] = when
+
+    def flush(self):
+        if self.writable:
+            self._mm.flush()
+
+    def close(self):
+        for name in ("_offsets", "_last_seen", "_view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if getattr(self, "_mm", None) is not None:
+            self.flush()
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.attacks.grammar import PayloadGrammar
+
+
+def plan_shards(count: int, shards: int) -> List[range]:
+    """Split range(count) into contiguous, near-equal slices"""
+    shards = max(1, min(shards, count or 1))
+    base, extra = divmod(count, shards)
+    ranges = []
+    start = 0
+    for shard in range(shards):
+        stop = start + base + (1 if shard < extra else 0)
+        ranges.append(range(start, stop))
+        start = stop
+    return ranges
+
+
+def _write_shard(task: Dict) -> Dict:
+    """Write one shard; runs in a worker process"""
+    from src.attacks.generator import PayloadGenerator
+
+    # Each shard gets its own RNG stream for obfuscation, while its slice of
+    # the grammar permutation (shared seed) keeps shards disjoint.
+    generator = PayloadGenerator(
+        creativity_level=task["creativity_level"],
+        seed=task["seed"] * 1_000_003 + task["shard"],
+        grammar=task["grammar"]
+    )
+    grammar = generator.grammar
+    high = generator.creativity_level == "high"
+
+    path = task["path"]
+    if task["compress"]:
+        handle = gzip.open(path, "wt", encoding="utf-8", compresslevel=task["compresslevel"])
+    else:
+        handle = open(path, "w", encoding="utf-8", buffering=task["buffer_size"])
+
+    digest = hashlib.sha256()
+    written = 0
+    buffer: List[str] = []
+    started = time.perf_counter()
+
+    def flush(batch: List[str]):
+        if high:
+            batch = [text for text, _ in generator.obfuscate_batch(batch)]
+        chunk = "\n".join(batch) + "\n"
+        handle.write(chunk)
+        digest.update(chunk.encode("utf-8"))
+        return len(batch)
+
+    with handle:
+        for payload in grammar.sample(task["stop"] - task["start"], seed=task["seed"], start=task["start"]):
+            buffer.append(payload)
+            if len(buffer) >= task["batch"]:
+                written += flush(buffer)
+                buffer = []
+
+        if buffer:
+            written += flush(buffer)
+
+    return {
+        "shard": task["shard"],
+        "file": os.path.basename(path),
+        "start": task["start"],
+        "count": written,
+        "bytes": os.path.getsize(path),
+        "sha256": digest.hexdigest(),
+        "transforms": generator.pipeline.stats(),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def generate_sharded(count: int, output_dir: str = None, shards: int = 8, workers: Optional[int] = None,
+                     compress: bool = False, seed: Optional[int] = None, creativity_level: str = "medium",
+                     grammar: PayloadGrammar = None, batch: int = 10_000, buffer_size: int = 1 << 20,
+                     compresslevel: int = 6, min_parallel: int = 100_000) -> Dict:
+    """Generate payloads across a process pool into shard files plus manifest.json.
+
+    Shards draw disjoint slices of one seeded permutation of the grammar, so
+    the corpus has no duplicates (before obfuscation) and each worker only
+    holds one write batch in memory. The sha256 in the manifest is over the
+    uncompressed shard text. Below min_parallel payloads the shards are
+    written in-process, where pool start-up would cost more than the work.
+    """
+    grammar = grammar or PayloadGrammar()
+    if count > grammar.size:
+        print(f"[!] Requested {count} payloads but the grammar only has {grammar.size} distinct ones")
+        count = grammar.size
+
+    if seed is None:
+        seed = int.from_bytes(os.urandom(4), "big")
+
+    if output_dir is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        output_dir = f"data/payloads/generated_{timestamp}"
+    os.makedirs(output_dir, exist_ok=True)
+
+    extension = ".txt.gz" if compress else ".txt"
+    tasks = []
+    for shard, indexes in enumerate(plan_shards(count, shards)):
+        tasks.append({
+            "shard": shard,
+            "path": os.path.join(output_dir, f"shard-{shard:05d}{extension}"),
+            "start": indexes.start,
+            "stop": indexes.stop,
+            "seed": seed,
+            "creativity_level": creativity_level,
+            "grammar": grammar,
+            "compress": compress,
+            "compresslevel": compresslevel,
+            "batch": batch,
+            "buffer_size": buffer_size
+        })
+
+    workers = workers or os.cpu_count() or 1
+    if count < min_parallel:
+        workers = 1
+    print(f"[*] Generating {count} payloads in {len(tasks)} shards with {min(workers, len(tasks))} workers...")
+    started = time.perf_counter()
+
+    if workers <= 1 or len(tasks) == 1:
+        results = [_write_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_write_shard, tasks))
+
+    elapsed = time.perf_counter() - started
+    manifest = {
+        "created": datetime.now().isoformat(),
+        "seed": seed,
+        "creativity_level": creativity_level,
+        "grammar_size": grammar.size,
+        "count": sum(r["count"] for r in results),
+        "compressed": compress,
+        "seconds": round(elapsed, 3),
+        "shards": results
+    }
+
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    rate = manifest["count"] / elapsed if elapsed else 0
+    print(f"[+] Wrote {manifest['count']} payloads to {output_dir} ({rate:,.0f}/s)")
+    manifest["path"] = manifest_path
+    return manifest
+
+
+def iter_shards(manifest_path: str):
+    """Stream payloads back out of a sharded corpus in shard order"""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    directory = os.path.dirname(manifest_path)
+    for shard in manifest["shards"]:
+        path = os.path.join(directory, shard["file"])
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                yield line.rstrip("\n")
@@ -0,0 +1,194 @@
+import random
+import re
+from collections import Counter
+from itertools import product
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class Transform:
+    """A named str -> str obfuscation.
+
+    fn takes (text, rng); deterministic transforms ignore the rng. batch, if
+    given, maps a whole list at once without a Python call per item.
+    """
+
+    def __init__(self, name: str, fn: Callable[[str, random.Random], str], description: str = "",
+                 batch: Callable[[Sequence[str]], List[str]] = None):
+        self.name = name
+        self.fn = fn
+        self.description = description
+        self.batch = batch
+
+    def __call__(self, text: str, rng: random.Random = None) -> str:
+        return self.fn(text, rng)
+
+    def apply_many(self, texts: Sequence[str], rng: random.Random = None) -> List[str]:
+        if self.batch is not None:
+            return self.batch(texts)
+        fn = self.fn
+        return [fn(text, rng) for text in texts]
+
+    def __repr__(self):
+        return f"Transform({self.name!r})"
+
+
+def _over_joined(texts: Sequence[str], fn: Callable[[str], str]) -> List[str]:
+    """Run fn once over the newline-joined batch.
+
+    Only valid for fns that work within a line and never add or remove
+    newlines; batches whose payloads contain newlines go one by one.
+    """
+    if not texts:
+        return []
+    joined = "\n".join(texts)
+    if joined.count("\n") != len(texts) - 1:
+        return [fn(text) for text in texts]
+    return fn(joined).split("\n")
+
+
+def method(name: str, fn: Callable[[str], str], description: str = "", joinable: bool = False) -> Transform:
+    """Wrap a plain str -> str function such as str.upper.
+
+    joinable: fn is line-local, so a batch can be transformed as one string
+    """
+    if joinable:
+        batch = lambda texts: _over_joined(texts, fn)
+    else:
+        batch = lambda texts: list(map(fn, texts))
+    return Transform(name, lambda s, rng: fn(s), description, batch=batch)
+
+
+def translate(name: str, mapping: Dict[str, str], description: str = "") -> Transform:
+    """Character substitution compiled to translate tables.
+
+    ASCII text goes through bytes.translate, which is several times faster
+    than str.translate; anything else uses the str table.
+    """
+    table = str.maketrans(mapping)
+    ascii_only = all(k.isascii() and v.isascii() and len(v) == 1 for k, v in mapping.items())
+    byte_table = bytes.maketrans(
+        "".join(mapping).encode("ascii"), "".join(mapping.values()).encode("ascii")
+    ) if ascii_only else None
+
+    def apply(text: str) -> str:
+        if byte_table is not None and text.isascii():
+            return text.encode("ascii").translate(byte_table).decode("ascii")
+        return text.translate(table)
+
+    return method(name, apply, description, joinable=True)
+
+
+def substitute(name: str, mapping: Dict[str, str], description: str = "") -> Transform:
+    """Word/substring substitution compiled to one alternation regex"""
+    pattern = re.compile("|".join(re.escape(k) for k in sorted(mapping, key=len, reverse=True)))
+    lookup = mapping.__getitem__
+    replace = lambda m: lookup(m.group())
+    return method(name, lambda s: pattern.sub(replace, s), description, joinable=True)
+
+
+def wrap(name: str, prefix: str = "", suffix: str = "", description: str = "") -> Transform:
+    return Transform(name, lambda s, rng: prefix + s + suffix, description,
+                     batch=lambda texts: [prefix + s + suffix for s in texts])
+
+
+def _alternating_case(text: str) -> str:
+    if text.isascii():
+        chars = bytearray(text.lower().encode("ascii"))
+        chars[::2] = text[::2].upper().encode("ascii")
+        return chars.decode("ascii")
+
+    # Case mapping can change the length (e.g. "ß" -> "SS"); go per character
+    return "".join(c.upper() if i % 2 == 0 else c.lower() for i, c in enumerate(text))
+
+
+def _reverse_some_words(text: str, rng: random.Random = None, probability: float = 0.3) -> str:
+    rng = rng or random
+    return " ".join(word[::-1] if rng.random() < probability else word for word in text.split())
+
+
+DEFAULT_TRANSFORMS = [
+    method("double_spaces", lambda s: s.replace(" ", "  "), "Double spaces", joinable=True),
+    method("upper", str.upper, "All caps", joinable=True),
+    method("lower", str.lower, "All lowercase", joinable=True),
+    method("alternating_case", _alternating_case, "Alternating case"),
+    wrap("trailing_punct", suffix=" .", description="Trailing punctuation"),
+    wrap("polite", "Hey, ", " thanks!", "Polite wrapper"),
+    wrap("question", "Quick question: ", description="Question wrapper"),
+    translate("leetspeak", {"i": "1", "e": "3", "a": "4", "o": "0"}, "Leetspeak"),
+    substitute("textspeak", {"you": "u", "are": "r", "the": "da"}, "Text speak"),
+    Transform("reverse_words", _reverse_some_words, "Some words reversed"),
+]
+
+
+class TransformPipeline:
+    """Seeded random composition of named transforms over batches of payloads.
+
+    Every payload gets between min_steps and max_steps transforms, drawn with
+    replacement. A batch draws all its plans up front, groups payloads that
+    share a plan and runs each transform chain once per group.
+    """
+
+    def __init__(self, transforms: Iterable[Transform] = None, min_steps: int = 1, max_steps: int = 2,
+                 seed: Optional[int] = None, rng: random.Random = None):
+        self.transforms = list(transforms or DEFAULT_TRANSFORMS)
+        self.by_name = {t.name: t for t in self.transforms}
+        self.min_steps = min_steps
+        self.max_steps = max_steps
+        self.rng = rng or random.Random(seed)
+        self.counts: Counter = Counter()
+
+        # Every possible plan, weighted so a plan's length is uniform over
+        # [min_steps, max_steps] and each step is uniform over the transforms
+        names = [t.name for t in self.transforms]
+        lengths = max_steps - min_steps + 1
+        self._plans: List[Tuple[str, ...]] = []
+        self._cum_weights: List[float] = []
+        total = 0.0
+        for length in range(min_steps, max_steps + 1):
+            for plan in product(names, repeat=length):
+                total += 1.0 / (lengths * len(names) ** length)
+                self._plans.append(plan)
+                self._cum_weights.append(total)
+
+    def plan(self, count: int) -> List[Tuple[str, ...]]:
+        """Draw the transform names for count payloads"""
+        return self.rng.choices(self._plans, cum_weights=self._cum_weights, k=count)
+
+    def apply_batch(self, payloads: Sequence[str],
+                    plans: Sequence[Tuple[str, ...]] = None) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Obfuscate a batch; returns (text, transform names) per payload"""
+        texts = list(payloads)
+        count = len(texts)
+
+        if plans is None:
+            catalog = self._plans
+            ids = self.rng.choices(range(len(catalog)), cum_weights=self._cum_weights, k=count)
+        else:
+            lookup: Dict[Tuple[str, ...], int] = {}
+            ids = [lookup.setdefault(tuple(plan), len(lookup)) for plan in plans]
+            catalog = list(lookup)
+
+        # Sort payloads by plan so each plan's payloads form one contiguous
+        # run, transform each run as a list, then restore the input order.
+        order = sorted(range(count), key=ids.__getitem__)
+        grouped = list(map(texts.__getitem__, order))
+        transformed: List[str] = []
+        position = 0
+        for plan_id, size in sorted(Counter(ids).items()):
+            group = grouped[position:position + size]
+            position += size
+            for name in catalog[plan_id]:
+                group = self.by_name[name].apply_many(group, self.rng)
+                self.counts[name] += size
+            transformed.extend(group)
+
+        inverse = sorted(range(count), key=order.__getitem__)
+        texts = list(map(transformed.__getitem__, inverse))
+        return list(zip(texts, map(catalog.__getitem__, ids)))
+
+    def apply(self, payload: str, names: Sequence[str] = None) -> Tuple[str, Tuple[str, ...]]:
+        plans = None if names is None else [tuple(names)]
+        return self.apply_batch([payload], plans)[0]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
@@ -0,0 +1,186 @@
+import json
+import os
+import random
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.attacks.dedup import payload_hash
+from src.core.analyzer import get_analyzer
+
+
+class PayloadBandit:
+    """Thompson-sampling payload scheduler with success statistics kept across runs.
+
+    Every payload is an arm with a Beta posterior per model. Its prior comes
+    from the success rate of the payload's technique on that model (or on
+    all models while that is still empty), weighted as prior_strength
+    pseudo-observations, plus a share of the payload's record on other
+    models. New payloads therefore start from what their technique has
+    shown, and each result sharpens both levels.
+
+    Works on the finding dicts the testers already produce: payload, model
+    and vulnerable.
+    """
+
+    def __init__(self, path: Optional[str] = ".cache/bandit_stats.json", prior_strength: float = 2.0,
+                 cross_model_weight: float = 0.5, seed: Optional[int] = None):
+        self.path = path
+        self.prior_strength = prior_strength
+        self.cross_model_weight = cross_model_weight
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._techniques: Dict[str, str] = {}
+        self._versions: Dict[str, int] = {}    # technique -> update count, for schedule()
+
+        # [successes, failures] at each level
+        self.payloads: Dict[str, Dict[str, List[float]]] = {}    # model -> payload key -> counts
+        self.any_model: Dict[str, List[float]] = {}               # payload key -> counts
+        self.techniques: Dict[str, Dict[str, List[float]]] = {}  # model -> technique -> counts
+        self.technique_totals: Dict[str, List[float]] = {}        # technique -> counts
+
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def payload_key(payload: str) -> str:
+        return payload_hash(payload).hex()
+
+    def technique(self, payload: str) -> str:
+        technique = self._techniques.get(payload)
+        if technique is None:
+            classified = get_analyzer().classify_payload(payload)
+            technique = classified[0] if classified else "other"
+            self._techniques[payload] = technique
+        return technique
+
+    def _posterior(self, payload: str, model: str) -> Tuple[float, float]:
+        return self._posterior_for(self.payload_key(payload), self.technique(payload), model)
+
+    def _posterior_for(self, key: str, technique: str, model: str) -> Tuple[float, float]:
+        s_t, f_t = self.techniques.get(model, {}).get(technique) or self.technique_totals.get(technique, (0, 0))
+        mean = (s_t + 1) / (s_t + f_t + 2)
+
+        s_p, f_p = self.payloads.get(model, {}).get(key, (0, 0))
+        s_x, f_x = self.any_model.get(key, (0, 0))
+        # The cross-model record includes this model's own results
+        s_x, f_x = max(0, s_x - s_p), max(0, f_x - f_p)
+
+        w = self.cross_model_weight
+        alpha = 1 + self.prior_strength * mean + s_p + w * s_x
+        beta = 1 + self.prior_strength * (1 - mean) + f_p + w * f_x
+        return alpha, beta
+
+    def sample(self, payload: str, model: str) -> float:
+        alpha, beta = self._posterior(payload, model)
+        return self.rng.betavariate(alpha, beta)
+
+    def expected(self, payload: str, model: str) -> float:
+        alpha, beta = self._posterior(payload, model)
+        return alpha / (alpha + beta)
+
+    def order(self, payloads: Iterable[str], model: str) -> List[str]:
+        """One Thompson draw per payload, highest first"""
+        with self._lock:
+            scored = [(self.sample(p, model), i, p) for i, p in enumerate(payloads)]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [p for _, _, p in scored]
+
+    def select(self, payloads: Iterable[str], model: str, budget: int) -> List[str]:
+        return self.order(payloads, model)[:budget]
+
+    def schedule(self, payloads: Iterable[str], model: str, budget: Optional[int] = None) -> Iterator[str]:
+        """Yield payloads one at a time, re-sampling the rest after every pick.
+
+        The caller reports each result with update() before asking for the
+        next payload, so a hit immediately lifts the rest of its technique.
+        """
+        remaining = list(dict.fromkeys(payloads))
+        budget = len(remaining) if budget is None else min(budget, len(remaining))
+        if not budget:
+            return
+
+        # Only an update() to a technique changes its payloads' posteriors,
+        # so draws are kept and just that technique is re-sampled
+        with self._lock:
+            arms = [(p, self.payload_key(p), self.technique(p)) for p in remaining]
+            by_technique: Dict[str, List[int]] = {}
+            for i, (_, _, technique) in enumerate(arms):
+                by_technique.setdefault(technique, []).append(i)
+            samples = [self.rng.betavariate(*self._posterior_for(key, technique, model)) for _, key, technique in arms]
+            seen = {technique: self._versions.get(technique, 0) for technique in by_technique}
+
+        for _ in range(budget):
+            with self._lock:
+                for technique, indices in by_technique.items():
+                    version = self._versions.get(technique, 0)
+                    if version == seen[technique]:
+                        continue
+                    seen[technique] = version
+                    for i in indices:
+                        if samples[i] is not None:
+                            _, key, _ = arms[i]
+                            samples[i] = self.rng.betavariate(*self._posterior_for(key, technique, model))
+            best = max((i for i in range(len(arms)) if samples[i] is not None), key=samples.__getitem__)
+            samples[best] = None
+            yield arms[best][0]
+
+    def update(self, findings: Iterable[Dict]):
+        """Fold finished findings into the statistics"""
+        with self._lock:
+            for finding in findings:
+                payload = finding.get("payload")
+                model = finding.get("model") or "unknown"
+                if not payload:
+                    continue
+
+                outcome = 0 if finding.get("vulnerable") else 1
+                key = self.payload_key(payload)
+                technique = self.technique(payload)
+
+                for counts in (
+                    self.payloads.setdefault(model, {}).setdefault(key, [0, 0]),
+                    self.any_model.setdefault(key, [0, 0]),
+                    self.techniques.setdefault(model, {}).setdefault(technique, [0, 0]),
+                    self.technique_totals.setdefault(technique, [0, 0]),
+                ):
+                    counts[outcome] += 1
+                self._versions[technique] = self._versions.get(technique, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "models": len(self.payloads),
+                "payloads": len(self.any_model),
+                "techniques": {
+                    technique: {"successes": s, "trials": s + f, "rate": round(s / (s + f), 3) if s + f else 0.0}
+                    for technique, (s, f) in sorted(self.technique_totals.items())
+                }
+            }
+
+    def _load(self):
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        self.payloads = data.get("payloads", {})
+        self.any_model = data.get("any_model", {})
+        self.techniques = data.get("techniques", {})
+        self.technique_totals = data.get("technique_totals", {})
+
+    def save(self):
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            data = {
+                "payloads": self.payloads,
+                "any_model": self.any_model,
+                "techniques": self.techniques,
+                "technique_totals": self.technique_totals
+            }
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
@@ -0,0 +1,257 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+
+class WorkQueue:
+    """Lease-based work queue stored in SQLite on a shared filesystem.
+
+    The payload x target x model matrix is split into units. Workers lease a
+    unit, heartbeat while they work on it and hand back findings; a unit
+    whose lease runs out is returned to the queue for another worker.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 120.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Rollback journal rather than WAL: WAL needs shared memory, which
+        # network filesystems don't provide.
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " target TEXT NOT NULL, provider TEXT NOT NULL, model TEXT NOT NULL,"
+            " payloads TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT);"
+            "CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires);"
+            "CREATE TABLE IF NOT EXISTS findings ("
+            " unit_id INTEGER NOT NULL, seq INTEGER NOT NULL, finding TEXT NOT NULL,"
+            " PRIMARY KEY (unit_id, seq));"
+        )
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def submit_matrix(self, targets: List[str], providers: List[Tuple[str, str]],
+                      payloads: List[str], chunk_size: int = 20) -> int:
+        """Split targets x (provider, model) x payloads into units"""
+        rows = []
+        for target in targets:
+            for provider, model in providers:
+                for start in range(0, len(payloads), chunk_size):
+                    chunk = payloads[start:start + chunk_size]
+                    rows.append((target, provider, model, json.dumps(chunk)))
+
+        def insert(conn):
+            conn.executemany(
+                "INSERT INTO units (target, provider, model, payloads) VALUES (?, ?, ?, ?)", rows
+            )
+
+        self._transaction(insert)
+        return len(rows)
+
+    def _requeue_expired(self, conn, now: float) -> int:
+        conn.execute(
+            "UPDATE units SET status = 'failed', worker = NULL, error = 'lease expired' "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts)
+        )
+        return conn.execute(
+            "UPDATE units SET status = 'pending', worker = NULL "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,)
+        ).rowcount
+
+    def requeue_expired(self) -> int:
+        """Return units with lapsed leases to the queue"""
+        return self._transaction(lambda conn: self._requeue_expired(conn, time.time()))
+
+    def lease(self, worker_id: str) -> Optional[Dict]:
+        """Atomically claim the next pending unit"""
+        def claim(conn):
+            now = time.time()
+            self._requeue_expired(conn, now)
+
+            row = conn.execute(
+                "SELECT id, target, provider, model, payloads, attempts FROM units "
+                "WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + self.lease_seconds, row[0])
+            )
+            return {
+                "id": row[0],
+                "target": row[1],
+                "provider": row[2],
+                "model": row[3],
+                "payloads": json.loads(row[4]),
+                "attempt": row[5] + 1
+            }
+
+        return self._transaction(claim)
+
+    def heartbeat(self, unit_id: int, worker_id: str) -> bool:
+        """Extend a lease; False means the lease was lost to another worker"""
+        def extend(conn):
+            return conn.execute(
+                "UPDATE units SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, unit_id, worker_id)
+            ).rowcount == 1
+
+        return self._transaction(extend)
+
+    def complete(self, unit_id: int, worker_id: str, findings: List[Dict]) -> bool:
+        def finish(conn):
+            owned = conn.execute(
+                "UPDATE units SET status = 'done', lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (unit_id, worker_id)
+            ).rowcount == 1
+            if owned:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO findings (unit_id, seq, finding) VALUES (?, ?, ?)",
+                    [(unit_id, i, json.dumps(f, default=str)) for i, f in enumerate(findings)]
+                )
+            return owned
+
+        return self._transaction(finish)
+
+    def fail(self, unit_id: int, worker_id: str, error: str):
+        def release(conn):
+            conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_expires = NULL, error = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, error[:500], unit_id, worker_id)
+            )
+
+        self._transaction(release)
+
+    def progress(self) -> Dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("pending", "leased", "done", "failed")}
+
+    def results(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT finding FROM findings ORDER BY unit_id, seq").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+class ScanWorker:
+    """Pulls units from a WorkQueue and runs them with the existing testers"""
+
+    def __init__(self, queue: WorkQueue, worker_id: str = None, concurrency: int = 4):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency
+        self.units_done = 0
+
+    def run(self, max_units: Optional[int] = None, idle_timeout: float = 0.0, poll_interval: float = 2.0):
+        """Process units until the queue is empty (after idle_timeout) or max_units"""
+        print(f"[*] Worker {self.worker_id} started")
+        idle_since = time.monotonic()
+
+        while max_units is None or self.units_done < max_units:
+            unit = self.queue.lease(self.worker_id)
+
+            if unit is None:
+                if time.monotonic() - idle_since >= idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self._process(unit)
+            idle_since = time.monotonic()
+
+        print(f"[+] Worker {self.worker_id} finished {self.units_done} units")
+        return self.units_done
+
+    def _process(self, unit: Dict):
+        print(f"[*] Unit {unit['id']}: {unit['provider']}/{unit['model']} x {len(unit['payloads'])} payloads")
+
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(unit["id"], stop), daemon=True)
+        beat.start()
+
+        try:
+            findings = self.execute(unit)
+        except Exception as e:
+            self.queue.fail(unit["id"], self.worker_id, str(e))
+            print(f"[!] Unit {unit['id']} failed: {str(e)[:80]}")
+            return
+        finally:
+            stop.set()
+            beat.join()
+
+        if self.queue.complete(unit["id"], self.worker_id, findings):
+            self.units_done += 1
+        else:
+            print(f"[!] Lease on unit {unit['id']} was lost; results discarded")
+
+    def _heartbeat(self, unit_id: int, stop: threading.Event):
+        interval = self.queue.lease_seconds / 3
+        while not stop.wait(interval):
+            if not self.queue.heartbeat(unit_id, self.worker_id):
+                return
+
+    def execute(self, unit: Dict) -> List[Dict]:
+        """Findings for a unit; backend errors raise, so the lease is
+        released for a retry instead of completed with partial or fake results"""
+        provider = unit["provider"]
+
+        if provider == "ollama":
+            from src.core.real_tester import RealAITester
+            tester = RealAITester(fallback=False, demo_mode=False)
+            return tester.test_local_ollama(
+                unit["target"], unit["payloads"], unit["model"],
+                limit=None, concurrency=self.concurrency
+            )
+
+        if provider == "openai":
+            from src.core.exploiter import AIExploiter
+            return AIExploiter(fallback=False).test_openai(unit["target"], unit["payloads"], unit["model"])
+
+        if provider == "simulated":
+            from src.core.scanner import AIScanner
+            return AIScanner().test_openai(unit["target"], unit["payloads"])
+
+        raise ValueError(f"Unknown provider: {provider}")
+
+
+def merge_results(queue: WorkQueue):
+    """Collect worker findings into a RealAITester so its reports apply unchanged"""
+    from src.core.real_tester import RealAITester
+
+    tester = RealAITester()
+    tester.results = queue.results()
+    return tester
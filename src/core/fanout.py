@@ -0,0 +1,145 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_CONCURRENCY = {
+    "ollama": 4,
+    "openai": 8,
+}
+
+
+class ProviderFanout:
+    """Send one payload set to every configured (provider, model) at once.
+
+    Each lane has its own worker pool, so a slow or throttled provider only
+    holds up its own queue. Pacing per provider comes from the shared
+    AdaptiveRateLimiter inside each provider call; with rate_limits the
+    fanout builds its own limiter from them instead and leaves the shared
+    one alone, lending it to the tester and exploiter only while run() is
+    in progress. Findings are collected in arrival order and passed to
+    on_result as they land; run() returns only its own findings, and
+    self.results keeps every run's. With a bandit, each lane sends its
+    payloads in the order sampled for its model, cut to budget.
+    """
+
+    def __init__(self, lanes: List[Tuple[str, str]], tester=None, exploiter=None,
+                 concurrency: Dict[str, int] = None, rate_limits: Dict[str, Tuple] = None,
+                 on_result: Optional[Callable[[Dict, int, int], None]] = None, timeout: float = 30.0,
+                 bandit=None, budget: Optional[int] = None):
+        self.lanes = lanes
+        self.tester = tester
+        self.exploiter = exploiter
+        self.concurrency = dict(DEFAULT_CONCURRENCY)
+        if concurrency:
+            self.concurrency.update(concurrency)
+        self.rate_limits = rate_limits or {}
+        self.rate_limiter = None
+        if self.rate_limits:
+            from src.core.ratelimit import AdaptiveRateLimiter
+            self.rate_limiter = AdaptiveRateLimiter(self.rate_limits)
+        self.on_result = on_result
+        self.timeout = timeout
+        self.bandit = bandit
+        self.budget = budget
+        self.results: List[Dict] = []
+        self.lane_stats: Dict[str, Dict] = {}
+
+    def _runner(self, provider: str) -> Callable[[str, str, str, int], Optional[Dict]]:
+        if provider == "ollama":
+            if self.tester is None:
+                from src.core.real_tester import RealAITester
+                self.tester = RealAITester()
+            return lambda system_prompt, payload, model, index: self.tester.test_payload(
+                system_prompt, payload, model, index=index, timeout=self.timeout
+            )
+
+        if provider == "openai":
+            if self.exploiter is None:
+                from src.core.exploiter import AIExploiter
+                self.exploiter = AIExploiter()
+            self.exploiter._prepare(quiet=True)
+            return lambda system_prompt, payload, model, index: self.exploiter.test_payload(
+                system_prompt, payload, model
+            )
+
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    def _lane_payloads(self, payloads: List[str], model: str) -> List[str]:
+        if self.bandit is not None:
+            return self.bandit.select(payloads, model, self.budget or len(payloads))
+        return payloads[:self.budget] if self.budget else payloads
+
+    def run(self, system_prompt: str, payloads: List[str]) -> List[Dict]:
+        plan = {(provider, model): self._lane_payloads(payloads, model) for provider, model in self.lanes}
+        total = sum(len(p) for p in plan.values())
+        print(f"[*] Fanning out {len(payloads)} payloads to {len(self.lanes)} provider lanes")
+
+        arrivals: "queue.Queue" = queue.Queue()
+        executors = []
+        started = time.monotonic()
+        # Stats accumulate over repeated runs (e.g. cluster representatives, then expansions)
+        pending: Dict[str, int] = {}
+        base_seconds: Dict[str, float] = {}
+
+        runners = {provider: self._runner(provider) for provider, _ in self.lanes}
+        clients = [c for c in (self.tester, self.exploiter) if c is not None] if self.rate_limiter else []
+        originals = [(client, client.rate_limiter) for client in clients]
+        for client in clients:
+            client.rate_limiter = self.rate_limiter
+
+        for provider, model in self.lanes:
+            runner = runners[provider]
+            lane = f"{provider}/{model}"
+            lane_payloads = plan[(provider, model)]
+            stats = self.lane_stats.setdefault(lane, {"submitted": 0, "completed": 0, "errors": 0, "seconds": 0.0})
+            stats["submitted"] += len(lane_payloads)
+            pending[lane] = len(lane_payloads)
+            base_seconds[lane] = stats["seconds"]
+
+            executor = ThreadPoolExecutor(
+                max_workers=self.concurrency.get(provider, 4),
+                thread_name_prefix=f"lane-{provider}"
+            )
+            executors.append(executor)
+
+            for index, payload in enumerate(lane_payloads):
+                future = executor.submit(runner, system_prompt, payload, model, index)
+                future.add_done_callback(lambda f, lane=lane: arrivals.put((lane, f)))
+
+        findings: List[Dict] = []
+        done = 0
+        try:
+            while done < total:
+                lane, future = arrivals.get()
+                done += 1
+
+                stats = self.lane_stats[lane]
+                stats["completed"] += 1
+                pending[lane] -= 1
+                if pending[lane] == 0:
+                    stats["seconds"] = round(base_seconds[lane] + time.monotonic() - started, 2)
+
+                try:
+                    finding = future.result()
+                except Exception as e:
+                    stats["errors"] += 1
+                    print(f"[!] {lane} error: {str(e)[:60]}")
+                    continue
+
+                if finding is None:
+                    stats["errors"] += 1
+                    continue
+
+                findings.append(finding)
+                self.results.append(finding)
+                if self.on_result:
+                    self.on_result(finding, done, total)
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=False)
+            for client, limiter in originals:
+                client.rate_limiter = limiter
+
+        return findings
@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
-import requests
 import re
 import json
 import time
 import socket
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional
 from urllib.parse import urlparse
 from datetime import datetime
 
+from src.core.transport import HTTPTransport, get_transport
+
 class AIHunter:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, transport: Optional[HTTPTransport] = None):
+        self.transport = transport or get_transport()
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        }
         self.discovered_endpoints = []
         
     def scan_github(self, keywords: List[str] = None) -> List[Dict]:
@@ -263,7 +264,7 @@ class AIHunter:
         
         # Try to get headers
         try:
-            response = self.session.head(url, timeout=5, allow_redirects=True)
+            response = self.transport.head(url, timeout=5, allow_redirects=True, headers=self.headers)
             
             fingerprint["metadata"]["headers"] = dict(response.headers)
             fingerprint["metadata"]["status_code"] = response.status_code
@@ -289,11 +290,11 @@ class AIHunter:
         
         for payload in test_payloads:
             try:
-                response = self.session.post(
+                response = self.transport.post(
                     url,
                     json=payload,
                     timeout=3,
-                    headers={"Content-Type": "application/json"}
+                    headers={**self.headers, "Content-Type": "application/json"}
                 )
                 
                 if response.status_code != 404:
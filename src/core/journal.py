@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+class ScanJournal:
+    """Append-only JSONL journal of completed (target, provider, model, payload) units.
+
+    Every result is flushed as soon as it is recorded, so a scan that dies
+    halfway can be resumed without re-sending finished requests. A "plan"
+    entry stores the payload list of a run, so runs with generated payloads
+    resume against the same set.
+    """
+
+    def __init__(self, path: str, resume: bool = False, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self.plan: Optional[Dict] = None
+        self._results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume and os.path.exists(path):
+            self._load()
+
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    @staticmethod
+    def unit_key(target: str, provider: str, model: str, payload: str) -> str:
+        material = json.dumps([target, provider, model, payload], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        complete = 0
+        with open(self.path, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A crash can leave a torn last line; the unit is simply redone
+                    break
+                complete += len(line)
+
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if entry.get("type") == "plan":
+                    self.plan = entry
+                elif entry.get("type") == "result":
+                    self._results[entry["key"]] = entry["result"]
+
+            # Cut the torn line off, or the next record would be glued onto it
+            f.truncate(complete)
+
+    def _append(self, entry: Dict):
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def set_plan(self, **plan):
+        """Record the inputs of this run so a resume can rebuild them"""
+        self.plan = {"type": "plan", **plan}
+        self._append(self.plan)
+
+    def get(self, target: str, provider: str, model: str, payload: str) -> Optional[Dict]:
+        return self._results.get(self.unit_key(target, provider, model, payload))
+
+    def record(self, target: str, provider: str, model: str, payload: str, result: Dict):
+        key = self.unit_key(target, provider, model, payload)
+        self._append({"type": "result", "key": key, "result": result})
+        with self._lock:
+            self._results[key] = result
+
+    def results(self) -> List[Dict]:
+        with self._lock:
+            return list(self._results.values())
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,109 @@
+import hashlib
+import threading
+from typing import Dict, List, Tuple
+
+
+class PrefixReuse:
+    """Reuse a local model server's cached state for a fixed system prompt.
+
+    ollama:   the system prompt and a short priming turn are evaluated once
+              with num_predict=0, and the returned `context` tokens are sent
+              with every payload, with keep_alive holding the model (and its
+              KV cache) in memory. Both go through the model's chat template;
+              Ollama returns no context for raw prompts.
+    llamacpp: every request carries the full prompt with cache_prompt=true,
+              so the server only evaluates the part after the shared prefix.
+              The prompt is sent raw (no chat template) so the prefix tokens
+              are byte-identical across requests.
+    """
+
+    PRIME_PROMPT = "Ready."
+
+    def __init__(self, transport, backend: str = "ollama", base_url: str = None,
+                 keep_alive: str = "30m"):
+        if backend not in ("ollama", "llamacpp"):
+            raise ValueError(f"Unsupported prefix backend: {backend}")
+
+        self.transport = transport
+        self.backend = backend
+        self.base_url = (base_url or (
+            "http://localhost:11434" if backend == "ollama" else "http://localhost:8080"
+        )).rstrip("/")
+        self.keep_alive = keep_alive
+        self.primed = 0
+        self._contexts: Dict[Tuple[str, str], List[int]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    @staticmethod
+    def prefix_text(system_prompt: str) -> str:
+        return f"{system_prompt}\n\nUser: "
+
+    def _prime(self, model: str, system_prompt: str, timeout: float) -> List[int]:
+        """Evaluate the system prompt once and keep the returned context"""
+        key = (model, hashlib.sha256(system_prompt.encode("utf-8")).hexdigest())
+
+        context = self._contexts.get(key)
+        if context is not None:
+            return context
+
+        # One prime per key; other keys don't wait behind it
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                return context
+
+            response = self.transport.post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": model,
+                    "system": system_prompt,
+                    "prompt": self.PRIME_PROMPT,
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {"num_predict": 0}
+                },
+                timeout=max(timeout, 30)
+            )
+            response.raise_for_status()
+
+            context = response.json().get("context")
+            if not context:
+                raise RuntimeError(f"Ollama returned no context when priming {model}")
+            self._contexts[key] = context
+            self.primed += 1
+            return context
+
+    def build_request(self, model: str, system_prompt: str, user_prompt: str,
+                      stream: bool, timeout: float) -> Tuple[str, Dict, str]:
+        """Return (url, body, response text field) for one payload"""
+        if self.backend == "llamacpp":
+            return f"{self.base_url}/completion", {
+                "prompt": self.prefix_text(system_prompt) + user_prompt,
+                "cache_prompt": True,
+                "stream": stream
+            }, "content"
+
+        return f"{self.base_url}/api/generate", {
+            "model": model,
+            "prompt": user_prompt,
+            "context": self._prime(model, system_prompt, timeout),
+            "stream": stream,
+            "keep_alive": self.keep_alive
+        }, "response"
+
+
+def latency_summary(samples: List[float]) -> Dict:
+    if not samples:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 1),
+        "p50_ms": round(ordered[len(ordered) // 2], 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1)
+    }
@@ -0,0 +1,247 @@
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+
+# Starting requests/min and tokens/min per provider. None means unlimited
+# until the provider tells us otherwise through headers or a 429.
+DEFAULT_LIMITS = {
+    "openai": (500, 200000),
+    "anthropic": (50, 40000),
+    "ollama": (None, None),
+}
+
+# Used when an unlimited provider starts returning 429s
+FALLBACK_RPM = 60
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse reset/retry values such as '20ms', '6m0s', '1.5', or an HTTP/ISO date"""
+    if not value:
+        return None
+
+    value = value.strip()
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Refills at rate_per_minute, holds at most one minute of capacity"""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.tokens = float(rate_per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(self.rate_per_minute, self.tokens + elapsed * self.rate_per_minute / 60.0)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return how long the caller must wait"""
+        self._refill(now)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens * 60.0 / self.rate_per_minute
+
+    def set_rate(self, rate_per_minute: float, now: float):
+        self._refill(now)
+        self.rate_per_minute = rate_per_minute
+        self.tokens = min(self.tokens, rate_per_minute)
+
+    def set_remaining(self, remaining: float, now: float):
+        self._refill(now)
+        self.tokens = min(self.tokens, remaining)
+
+
+class ProviderLimit:
+    """Request and token buckets for one (provider, model) pair"""
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float]):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.scale = 1.0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def apply_scale(self, now: float):
+        if self.requests:
+            self.requests.set_rate(max(1.0, self.rpm * self.scale), now)
+        if self.tokens:
+            self.tokens.set_rate(max(1.0, self.tpm * self.scale), now)
+
+
+class AdaptiveRateLimiter:
+    """Per-provider, per-model token-bucket limiter.
+
+    Rates start from DEFAULT_LIMITS, follow the provider's rate-limit headers
+    when present, halve on every 429 and creep back up on each success.
+    """
+
+    backoff_factor = 0.5
+    recovery_step = 0.05
+    min_scale = 0.05
+
+    def __init__(self, limits: Dict[str, Tuple[Optional[float], Optional[float]]] = None):
+        self.limits = dict(DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._state: Dict[Tuple[str, str], ProviderLimit] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, provider: str, model: str) -> ProviderLimit:
+        key = (provider, model)
+        state = self._state.get(key)
+        if state is None:
+            rpm, tpm = self.limits.get(provider, (None, None))
+            state = self._state[key] = ProviderLimit(rpm, tpm)
+        return state
+
+    def acquire(self, provider: str, model: str, tokens: int = 0) -> float:
+        """Block until a request of the given token size may be sent"""
+        with self._lock:
+            state = self._get(provider, model)
+            now = time.monotonic()
+            wait = max(0.0, state.blocked_until - now)
+            if state.requests:
+                wait = max(wait, state.requests.reserve(1, now))
+            if state.tokens and tokens:
+                wait = max(wait, state.tokens.reserve(tokens, now))
+            state.waited += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record(self, provider: str, model: str, status_code: int,
+               headers: Mapping[str, str] = None, reserved_tokens: int = 0,
+               used_tokens: Optional[int] = None):
+        """Feed a response back into the limiter"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+        with self._lock:
+            state = self._get(provider, model)
+            now = time.monotonic()
+
+            self._apply_headers(state, headers, now)
+
+            if state.tokens and used_tokens is not None and used_tokens != reserved_tokens:
+                state.tokens.tokens -= used_tokens - reserved_tokens
+
+            if status_code == 429:
+                state.throttled += 1
+                if not state.requests:
+                    state.rpm = FALLBACK_RPM
+                    state.requests = TokenBucket(FALLBACK_RPM)
+                    state.requests.tokens = 0
+                state.scale = max(self.min_scale, state.scale * self.backoff_factor)
+                state.apply_scale(now)
+
+                retry_after = parse_duration(headers.get("retry-after-ms", ""))
+                if retry_after is not None:
+                    retry_after /= 1000.0
+                else:
+                    retry_after = parse_duration(headers.get("retry-after"))
+                if retry_after is None:
+                    retry_after = 60.0 / state.requests.rate_per_minute
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+
+            elif status_code < 400 and state.scale < 1.0:
+                state.scale = min(1.0, state.scale + self.recovery_step)
+                state.apply_scale(now)
+
+    def _apply_headers(self, state: ProviderLimit, headers: Dict[str, str], now: float):
+        for kind in ("requests", "tokens"):
+            limit = headers.get(f"x-ratelimit-limit-{kind}") or headers.get(f"anthropic-ratelimit-{kind}-limit")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}") or headers.get(f"anthropic-ratelimit-{kind}-remaining")
+            reset = headers.get(f"x-ratelimit-reset-{kind}") or headers.get(f"anthropic-ratelimit-{kind}-reset")
+
+            if limit:
+                try:
+                    limit_value = float(limit)
+                except ValueError:
+                    limit_value = None
+                if limit_value:
+                    if kind == "requests":
+                        state.rpm = limit_value
+                        if not state.requests:
+                            state.requests = TokenBucket(limit_value)
+                    else:
+                        state.tpm = limit_value
+                        if not state.tokens:
+                            state.tokens = TokenBucket(limit_value)
+                    state.apply_scale(now)
+
+            bucket = state.requests if kind == "requests" else state.tokens
+            if remaining and bucket:
+                try:
+                    remaining_value = float(remaining)
+                except ValueError:
+                    continue
+                bucket.set_remaining(remaining_value, now)
+                if remaining_value <= 0:
+                    reset_after = parse_duration(reset)
+                    if reset_after:
+                        state.blocked_until = max(state.blocked_until, now + reset_after)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                f"{provider}/{model}": {
+                    "rpm": round(state.requests.rate_per_minute, 1) if state.requests else None,
+                    "tpm": round(state.tokens.rate_per_minute, 1) if state.tokens else None,
+                    "scale": round(state.scale, 3),
+                    "throttled": state.throttled,
+                    "waited_seconds": round(state.waited, 2)
+                }
+                for (provider, model), state in self._state.items()
+            }
+
+
+_default_limiter: Optional[AdaptiveRateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Return the process-wide shared limiter"""
+    global _default_limiter
+
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = AdaptiveRateLimiter()
+        return _default_limiter
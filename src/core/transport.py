@@ -0,0 +1,159 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DNSCache:
+    """TTL cache in front of socket.getaddrinfo, holding at most max_entries
+    lookups (least recently used are evicted first)"""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # getaddrinfo arguments -> (expiry, result)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._resolve = socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        result = self._resolve(host, port, family, type, proto, flags)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return result
+
+    def install(self):
+        """Route every getaddrinfo call in the process through this cache"""
+        if getattr(socket.getaddrinfo, "__self__", None) is not self:
+            self._resolve = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        """Restore the resolver that install() replaced.
+
+        Left alone if something else has replaced getaddrinfo since, so a
+        later hook is not undone.
+        """
+        if getattr(socket.getaddrinfo, "__self__", None) is self:
+            socket.getaddrinfo = self._resolve
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class HTTPTransport:
+    """Keep-alive HTTP transport shared by the hunter, tester and exploiter.
+
+    requests keeps one urllib3 connection pool per (scheme, host, port); the
+    adapter settings here bound how many hosts are pooled and how many idle
+    connections each pool retains for reuse.
+
+    dns_ttl opts into a DNSCache. It replaces socket.getaddrinfo for the whole
+    process until close(), so it is off unless asked for.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32,
+                 max_retries: int = 0, dns_ttl: Optional[float] = None):
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries
+        )
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self.dns_cache = None
+        if dns_ttl:
+            self.dns_cache = DNSCache(dns_ttl)
+            self.dns_cache.install()
+
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        with self._lock:
+            self.request_count += 1
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def metrics(self) -> Dict:
+        """Connection reuse per pooled host"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            requests_sent = pool.num_requests
+            connections = pool.num_connections
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": requests_sent,
+                "connections_opened": connections,
+                "reuse_ratio": round(1 - connections / requests_sent, 3) if requests_sent else 0.0
+            }
+
+        total_requests = sum(h["requests"] for h in hosts.values())
+        total_connections = sum(h["connections_opened"] for h in hosts.values())
+
+        return {
+            "requests": self.request_count,
+            "connections_opened": total_connections,
+            "reuse_ratio": round(1 - total_connections / total_requests, 3) if total_requests else 0.0,
+            "dns_cache_hits": self.dns_cache.hits if self.dns_cache else 0,
+            "dns_cache_misses": self.dns_cache.misses if self.dns_cache else 0,
+            "hosts": hosts
+        }
+
+    def close(self):
+        self.session.close()
+        if self.dns_cache is not None:
+            self.dns_cache.uninstall()
+
+
+_default_transport: Optional[HTTPTransport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Return the process-wide shared transport"""
+    global _default_transport
+
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport()
+        return _default_transport
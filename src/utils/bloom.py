@@ -0,0 +1,61 @@
+import hashlib
+import math
+import os
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte keys (double hashing).
+
+    No false negatives; false positives at about error_rate once
+    `capacity` keys have been added.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes):
+        digest = key if len(key) >= 16 else hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        m = self.num_bits
+        return ((h1 + i * h2) % m for i in range(self.num_hashes))
+
+    def add(self, key: bytes):
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        # Probe lazily: most lookups are misses and stop at the first clear bit
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"BLM1")
+            for value in (self.capacity, self.num_bits, self.num_hashes, self.count):
+                f.write(value.to_bytes(8, "little"))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        with open(path, "rb") as f:
+            if f.read(4) != b"BLM1":
+                raise ValueError(f"Not a Bloom filter file: {path}")
+            capacity, num_bits, num_hashes, count = (int.from_bytes(f.read(8), "little") for _ in range(4))
+            bloom = cls.__new__(cls)
+            bloom.capacity = capacity
+            bloom.num_bits = num_bits
+            bloom.num_hashes = num_hashes
+            bloom.count = count
+            bloom.error_rate = None
+            bloom.bits = bytearray(f.read())
+        return bloom
@@ -88,6 +88,16 @@ class TerminalDashboard:
         
         print(f"  └{border}┘")
     
+    def print_live_result(self, finding: Dict, done: int, total: int):
+        """One line per result as it arrives during a live scan"""
+        lane = f"{finding.get('provider', 'unknown')}/{finding.get('model', 'unknown')}"
+        payload = finding.get("payload", "")[:40]
+        
+        if finding.get("vulnerable"):
+            self.print_status(f"[{done}/{total}] {lane} VULNERABLE: {payload}", "vuln")
+        else:
+            self.print_status(f"[{done}/{total}] {lane} safe: {payload}", "safe")
+    
     def print_summary_stats(self, stats: Dict):
         print("\n" + "═" * self.width)
         print(" SCAN SUMMARY")
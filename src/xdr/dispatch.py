@@ -0,0 +1,82 @@
+from typing import Callable, Dict, Iterable, List, Tuple
+
+ANY = "*"
+
+
+class AlphaNetwork:
+    """Condition tests shared by every rule, in the manner of Rete alpha nodes.
+
+    Identical conditions (same canonical key, e.g. "confidence>=0.8")
+    registered by different rules become one node, and each node runs at
+    most once per event no matter how many rules ask for it.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, Callable] = {}
+        self.users: Dict[str, int] = {}
+        self._memo: Dict[str, bool] = {}
+        self.evaluations = 0
+        self.reused = 0
+
+    def register(self, key: str, check: Callable) -> str:
+        if key not in self.nodes:
+            self.nodes[key] = check
+        self.users[key] = self.users.get(key, 0) + 1
+        return key
+
+    def begin(self, event):
+        """Start a new event; forget the previous event's results"""
+        self._memo.clear()
+
+    def test(self, key: str, event) -> bool:
+        memo = self._memo
+        result = memo.get(key)
+        if result is None:
+            result = memo[key] = bool(self.nodes[key](event))
+            self.evaluations += 1
+        else:
+            self.reused += 1
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "nodes": len(self.nodes),
+            "shared_nodes": sum(1 for users in self.users.values() if users > 1),
+            "evaluations": self.evaluations,
+            "reused": self.reused
+        }
+
+
+class RuleIndex:
+    """Dispatch index from (source, event_type) to the rules interested in it.
+
+    Rules declare interests as (source, event_type) pairs where either side
+    may be "*". The candidate list for a concrete pair is the union of its
+    four generalizations in rule order, built once and cached, so dispatch
+    is a single dict lookup per event.
+    """
+
+    def __init__(self):
+        self.rules: List = []
+        self._by_interest: Dict[Tuple[str, str], List[int]] = {}
+        self._cache: Dict[Tuple[str, str], Tuple] = {}
+
+    def add(self, rule, interests: Iterable[Tuple[str, str]]):
+        position = len(self.rules)
+        self.rules.append(rule)
+        for interest in set(interests):
+            self._by_interest.setdefault(interest, []).append(position)
+        self._cache.clear()
+
+    def candidates(self, source: str, event_type: str) -> Tuple:
+        key = (source, event_type)
+        rules = self._cache.get(key)
+        if rules is None:
+            positions = set()
+            for interest in (key, (source, ANY), (ANY, event_type), (ANY, ANY)):
+                positions.update(self._by_interest.get(interest, ()))
+            rules = self._cache[key] = tuple(self.rules[p] for p in sorted(positions))
+        return rules
+
+    def __len__(self) -> int:
+        return len(self.rules)
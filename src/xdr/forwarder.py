@@ -0,0 +1,360 @@
+import dataclasses
+import json
+import os
+import queue
+import random
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from src.core.ratelimit import parse_duration
+from src.core.transport import HTTPTransport, get_transport
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def _default(value):
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def encode_record(record) -> bytes:
+    return json.dumps(record, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class SIEMForwarder:
+    """Ships records to a SIEM HTTP collector as gzip-compressed NDJSON batches.
+
+    submit() only enqueues; a sender thread cuts a batch when it reaches
+    batch_size records, batch_bytes of NDJSON or flush_interval seconds,
+    and POSTs it once over the shared keep-alive transport.
+
+    The sender never sleeps on a live batch. One that fails transiently, or
+    that is cut while the queue is above high_water (a fraction of
+    max_queue), goes to the on-disk spool. After a failure the SIEM counts
+    as down for an exponential backoff with jitter (or its Retry-After):
+    new batches are spooled directly and the oldest spooled batch is
+    retried as a probe once the backoff ends. When it is accepted the spool
+    is drained oldest first, interleaved with live batches. The spool
+    survives restarts. When it reaches spool_limit bytes the sender holds
+    its batch, the queue fills, and submit() blocks: ingestion slows to
+    what the SIEM accepts instead of dropping or buffering without bound.
+    """
+
+    def __init__(self, endpoint: str, batch_size: int = 500, batch_bytes: int = 1 << 20,
+                 flush_interval: float = 2.0, max_queue: int = 10_000,
+                 spool_dir: str = ".cache/siem_spool", spool_limit: int = 256 << 20,
+                 high_water: float = 0.5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 timeout: float = 10.0, compresslevel: int = 6, headers: Optional[Dict[str, str]] = None,
+                 transport: HTTPTransport = None):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+        self.spool_limit = spool_limit
+        self.high_water = max(1, int(max_queue * high_water))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.compresslevel = compresslevel
+        self.transport = transport or get_transport()
+        self.headers = {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+        self.headers.update(headers or {})
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._down_until = 0.0
+        self._failures = 0
+
+        os.makedirs(os.path.join(spool_dir, "rejected"), exist_ok=True)
+        self._spool: List[Tuple[str, int]] = sorted(
+            (os.path.join(spool_dir, name), os.path.getsize(os.path.join(spool_dir, name)))
+            for name in os.listdir(spool_dir) if name.endswith(".ndjson.gz")
+        )
+        self.spool_bytes = sum(size for _, size in self._spool)
+
+        self.started = time.monotonic()
+        self.records_in = 0
+        self.records_sent = 0
+        self.batches_sent = 0
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+        self.retries = 0
+        self.spooled_batches = 0
+        self.rejected_batches = 0
+        self.blocked_seconds = 0.0
+        self.send_seconds = 0.0
+        if self._spool:
+            print(f"[*] SIEM spool holds {len(self._spool)} batches ({self.spool_bytes} bytes) from a previous run")
+
+        self._thread = threading.Thread(target=self._run, name="siem-forwarder", daemon=True)
+        self._thread.start()
+
+    # Ingestion side
+
+    def submit(self, record, timeout: Optional[float] = None) -> bool:
+        """Queue one record; blocks while the forwarder is saturated.
+
+        Returns False if timeout elapsed first (the record is not queued).
+        """
+        if self._stop.is_set():
+            raise RuntimeError("SIEMForwarder is closed")
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            started = time.monotonic()
+            try:
+                self._queue.put(record, timeout=timeout)
+            except queue.Full:
+                return False
+            finally:
+                with self._lock:
+                    self.blocked_seconds += time.monotonic() - started
+        with self._lock:
+            self.records_in += 1
+        return True
+
+    def submit_many(self, records) -> int:
+        return sum(1 for record in records if self.submit(record))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send (or spool) everything submitted so far; False on timeout"""
+        marker = _Flush()
+        started = time.monotonic()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        if timeout is not None:
+            timeout = max(0.0, timeout - (time.monotonic() - started))
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Flush and stop the sender; whatever is left stays in the spool"""
+        if self._stop.is_set():
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Sender side
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch, markers = self._collect()
+            if batch is not None:
+                self._deliver(batch)
+            elif self._spool:
+                self._drain_one()
+            for marker in markers:
+                marker.done.set()
+
+        # Closed: anything still queued goes to the spool for the next run
+        while True:
+            batch, markers = self._collect(linger=False)
+            for marker in markers:
+                marker.done.set()
+            if batch is None:
+                break
+            self._spill(batch[0], batch[1])
+
+    def _collect(self, linger: bool = True) -> Tuple[Optional[Tuple[bytes, int, int]], List[_Flush]]:
+        """Next batch as (gzip body, records, raw bytes), and any flush markers reached"""
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 31)
+        chunks: List[bytes] = []
+        records = 0
+        raw = 0
+        markers: List[_Flush] = []
+        deadline = None
+        # Idle with a spool to drain: don't wait, unless the SIEM is down anyway
+        wait = 0.5
+        if self._spool:
+            wait = min(wait, max(0.0, self._down_until - time.monotonic()))
+
+        while records < self.batch_size and raw < self.batch_bytes:
+            remaining = wait if deadline is None else deadline - time.monotonic()
+            if deadline is not None and remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining) if linger and remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Flush):
+                markers.append(item)
+                break
+            line = encode_record(item)
+            chunks.append(compressor.compress(line))
+            records += 1
+            raw += len(line)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+
+        if not records:
+            return None, markers
+        chunks.append(compressor.flush())
+        return (b"".join(chunks), records, raw), markers
+
+    def _deliver(self, batch: Tuple[bytes, int, int]):
+        body, records, raw = batch
+        with self._lock:
+            self.raw_bytes += raw
+
+        # Down or falling behind: the spool absorbs it and submit() keeps flowing
+        if time.monotonic() < self._down_until or self._queue.qsize() >= self.high_water:
+            self._spill(body, records)
+            return
+
+        status, retry_after = self._post(body)
+        if status == "sent":
+            self._sent(body, records)
+            # Interleave one spooled batch with live traffic after an outage
+            if self._spool:
+                self._drain_one()
+        elif status == "rejected":
+            self._reject(body=body)
+        else:
+            self._mark_down(retry_after)
+            self._spill(body, records)
+
+    def _post(self, body: bytes) -> Tuple[str, Optional[float]]:
+        """One attempt: ("sent" | "rejected" | "failed", Retry-After seconds).
+
+        "rejected" is a 4xx that retrying will not help; "failed" is worth
+        retrying later from the spool.
+        """
+        started = time.monotonic()
+        try:
+            response = self.transport.post(self.endpoint, data=body, headers=self.headers, timeout=self.timeout)
+            status = response.status_code
+            response.close()
+        except (requests.RequestException, OSError) as e:
+            if not self._failures:
+                print(f"[!] SIEM unreachable: {type(e).__name__}")
+            return "failed", None
+
+        if status < 300:
+            with self._lock:
+                self.send_seconds += time.monotonic() - started
+            return "sent", None
+        if status not in RETRYABLE_STATUS:
+            print(f"[!] SIEM rejected batch: HTTP {status}")
+            return "rejected", None
+        return "failed", parse_duration(response.headers.get("Retry-After"))
+
+    def _sent(self, body: bytes, records: int):
+        with self._lock:
+            self.records_sent += records
+            self.batches_sent += 1
+            self.sent_bytes += len(body)
+        self._failures = 0
+        self._down_until = 0.0
+
+    def _mark_down(self, retry_after: Optional[float] = None):
+        """Hold sends for a backoff that grows with consecutive failures"""
+        self._failures += 1
+        if retry_after is not None:
+            delay = min(self.max_backoff, retry_after)
+        else:
+            delay = min(self.max_backoff, self.backoff * 2 ** self._failures)
+            delay = random.uniform(delay / 2, delay)
+        self._down_until = time.monotonic() + delay
+
+    def _spill(self, body: bytes, records: int):
+        # Full spool: hold the batch (and so the queue) until the SIEM takes
+        # the oldest spooled batch; this is what pushes back on submit()
+        while self._spool and self.spool_bytes + len(body) > self.spool_limit and not self._stop.is_set():
+            self._drain_one(wait=True)
+        with self._lock:
+            self._sequence += 1
+            name = f"{time.time_ns():020d}-{self._sequence:06d}-{records}.ndjson.gz"
+        path = os.path.join(self.spool_dir, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            self._spool.append((path, len(body)))
+            self.spool_bytes += len(body)
+            self.spooled_batches += 1
+
+    def _drain_one(self, wait: bool = False) -> bool:
+        """Send the oldest spooled batch if the SIEM is (probably) up"""
+        now = time.monotonic()
+        if now < self._down_until:
+            if not wait:
+                return False
+            time.sleep(self._down_until - now)
+        if not self._spool:
+            return False
+
+        path, size = self._spool[0]
+        with open(path, "rb") as f:
+            body = f.read()
+        if self._failures:
+            with self._lock:
+                self.retries += 1
+        status, retry_after = self._post(body)
+        if status == "failed":
+            self._mark_down(retry_after)
+            return False
+
+        records = int(os.path.basename(path).split("-")[2].split(".")[0])
+        if status == "sent":
+            self._sent(body, records)
+            os.remove(path)
+        else:
+            self._reject(path=path)
+        with self._lock:
+            self._spool.pop(0)
+            self.spool_bytes -= size
+        return True
+
+    def _reject(self, body: bytes = None, path: str = None):
+        """Keep a batch the SIEM refused under rejected/ for inspection"""
+        with self._lock:
+            self.rejected_batches += 1
+            self._sequence += 1
+            sequence = self._sequence
+        rejected = os.path.join(self.spool_dir, "rejected")
+        if path is not None:
+            os.replace(path, os.path.join(rejected, os.path.basename(path)))
+        else:
+            with open(os.path.join(rejected, f"{time.time_ns():020d}-{sequence:06d}.ndjson.gz"), "wb") as f:
+                f.write(body)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "records_in": self.records_in,
+                "records_sent": self.records_sent,
+                "records_per_sec": round(self.records_sent / elapsed, 1) if elapsed else 0.0,
+                "batches_sent": self.batches_sent,
+                "compression_ratio": round(self.raw_bytes / self.sent_bytes, 2) if self.sent_bytes else 0.0,
+                "avg_send_ms": round(self.send_seconds / self.batches_sent * 1000, 2) if self.batches_sent else 0.0,
+                "retries": self.retries,
+                "queue_depth": self._queue.qsize(),
+                "spool_batches": len(self._spool),
+                "spool_bytes": self.spool_bytes,
+                "spooled_batches": self.spooled_batches,
+                "rejected_batches": self.rejected_batches,
+                "blocked_seconds": round(self.blocked_seconds, 3),
+                "siem_up": time.monotonic() >= self._down_until
+            }
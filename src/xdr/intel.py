@@ -0,0 +1,459 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import socket
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from src.utils.bloom import BloomFilter
+from src.xdr.models import XDEvent
+
+# Feed files: one indicator per line, optionally followed by a label
+# (comma or whitespace separated); "#" starts a comment. Indicators are
+# IPv4/IPv6 addresses or CIDRs, domains (which also match their
+# subdomains) and MD5/SHA-1/SHA-256 hashes. The label defaults to the
+# feed's file name.
+
+IP_FIELDS = ("source_ip", "dest_ip", "ip", "client_ip", "remote_ip")
+DOMAIN_FIELDS = ("domain", "dest_domain", "hostname", "url")
+HASH_FIELDS = ("file_hash", "hash", "md5", "sha1", "sha256")
+
+_MAGIC = b"IOC1"
+_HEADER = struct.Struct("<4sQ")    # magic, metadata bytes
+_HASH = re.compile(r"^(?:[0-9a-f]{32}|[0-9a-f]{40}|[0-9a-f]{64})$")
+_DOMAIN = re.compile(r"^(?=.{1,253}$)(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z][a-z0-9-]{0,61}[a-z0-9]$")
+_SEPARATOR = re.compile(r"[,\s]+")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _digest(kind: str, value: str) -> bytes:
+    return hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=16).digest()
+
+
+def _key(digest: bytes) -> int:
+    return int.from_bytes(digest[:8], "little")
+
+
+def ip_range(value: str) -> Tuple[int, int, int]:
+    """(address width, first, last) of an IP or CIDR; raises ValueError"""
+    address, _, prefix = value.partition("/")
+    family, width = (socket.AF_INET6, 128) if ":" in address else (socket.AF_INET, 32)
+    try:
+        start = int.from_bytes(socket.inet_pton(family, address), "big")
+    except OSError:
+        raise ValueError(f"Bad address: {value!r}")
+    bits = int(prefix) if prefix else width
+    if not 0 <= bits <= width:
+        raise ValueError(f"Bad prefix: {value!r}")
+    host = (1 << (width - bits)) - 1
+    start &= ~host
+    return width, start, start | host
+
+
+def parse_indicator(value: str) -> Optional[Tuple[str, object]]:
+    """(kind, normalized) for one indicator: ("ip", (width, first, last)),
+    ("domain", str) or ("hash", str)"""
+    value = value.strip().lower().rstrip(".")
+    if not value:
+        return None
+    if _HASH.match(value):
+        return "hash", value
+    if value[0].isdigit() or ":" in value:
+        try:
+            return "ip", ip_range(value)
+        except ValueError:
+            pass
+    if _DOMAIN.match(value):
+        return "domain", value
+    return None
+
+
+def read_feed(path: str) -> Iterator[Tuple[str, str]]:
+    """(indicator, label) pairs of a feed file"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = _SEPARATOR.split(line, 1)
+            yield fields[0], (fields[1].strip() if len(fields) > 1 else name)
+
+
+def _flatten(ranges: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Disjoint (start, end, label) intervals from nested CIDR ranges; the
+    most specific range wins where they overlap"""
+    ranges.sort(key=lambda r: (r[0], -r[1]))
+    out: List[Tuple[int, int, int]] = []
+    stack: List[Tuple[int, int, int]] = []
+    position = 0
+
+    def emit(start, end, label):
+        if start > end:
+            return
+        if out and out[-1][2] == label and out[-1][1] + 1 == start:
+            out[-1] = (out[-1][0], end, label)
+        else:
+            out.append((start, end, label))
+
+    for start, end, label in ranges:
+        while stack and stack[-1][1] < start:
+            top = stack.pop()
+            emit(position, top[1], top[2])
+            position = max(position, top[1] + 1)
+        if stack:
+            emit(position, start - 1, stack[-1][2])
+        position = start
+        stack.append((start, end, label))
+    while stack:
+        top = stack.pop()
+        emit(position, top[1], top[2])
+        position = max(position, top[1] + 1)
+    return out
+
+
+class _WideKeys:
+    """Sequence view of fixed-width big-endian keys, so bisect can search them"""
+
+    def __init__(self, view: memoryview, width: int):
+        self.view = view
+        self.width = width
+
+    def __len__(self) -> int:
+        return len(self.view) // self.width
+
+    def __getitem__(self, index: int) -> bytes:
+        start = index * self.width
+        return bytes(self.view[start:start + self.width])
+
+
+class IOCSnapshot:
+    """Compiled IOC set in one memory-mapped file.
+
+    IPs and CIDRs are flattened into sorted, disjoint intervals (one for
+    IPv4 as uint32 arrays, one for IPv6 as 16-byte keys), so a lookup is a
+    binary search. Domains and hashes are stored as a sorted array of
+    64-bit keys behind a Bloom filter: most event fields are not
+    indicators, and a Bloom miss answers them without the search. Opening
+    only maps the file and reads its metadata, so startup does not depend
+    on feed size.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, meta_size = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"Not an IOC snapshot: {path}")
+        self.meta = json.loads(self._mm[_HEADER.size:_HEADER.size + meta_size].decode("utf-8"))
+        self.labels: List[str] = self.meta["labels"]
+        counts = self.meta["counts"]
+
+        view = memoryview(self._mm)
+        position = _align(_HEADER.size + meta_size)
+
+        def section(size: int, fmt: str = None):
+            nonlocal position
+            part = view[position:position + size]
+            position = _align(position + size)
+            return part.cast(fmt) if fmt else part
+
+        n4, n6, nk = counts["ipv4"], counts["ipv6"], counts["keys"]
+        self._v4 = (section(n4 * 4, "I"), section(n4 * 4, "I"), section(n4 * 4, "I"))
+        self._v6 = (_WideKeys(section(n6 * 16), 16), _WideKeys(section(n6 * 16), 16), section(n6 * 4, "I"))
+        self._keys = section(nk * 8, "Q")
+        self._key_labels = section(nk * 4, "I")
+
+        bloom = self.meta["bloom"]
+        self.bloom = BloomFilter.__new__(BloomFilter)
+        self.bloom.capacity = bloom["capacity"]
+        self.bloom.num_bits = bloom["num_bits"]
+        self.bloom.num_hashes = bloom["num_hashes"]
+        self.bloom.count = nk
+        self.bloom.error_rate = bloom["error_rate"]
+        self.bloom.bits = section((bloom["num_bits"] + 7) // 8)
+        self._view = view
+
+    @staticmethod
+    def build(path: str, feeds: Sequence[str], error_rate: float = 0.001) -> Dict:
+        """Compile feed files into a snapshot at path (written atomically)"""
+        labels: Dict[str, int] = {}
+        v4: List[Tuple[int, int, int]] = []
+        v6: List[Tuple[int, int, int]] = []
+        keys: Dict[int, int] = {}
+        digests: List[bytes] = []
+        invalid = 0
+
+        for feed in feeds:
+            for indicator, label in read_feed(feed):
+                parsed = parse_indicator(indicator)
+                if parsed is None:
+                    invalid += 1
+                    continue
+                label_id = labels.setdefault(label, len(labels))
+                kind, value = parsed
+                if kind == "ip":
+                    width, start, end = value
+                    (v4 if width == 32 else v6).append((start, end, label_id))
+                else:
+                    digest = _digest(kind, value)
+                    key = _key(digest)
+                    if key not in keys:
+                        keys[key] = label_id
+                        digests.append(digest)
+
+        v4 = _flatten(v4)
+        v6 = _flatten(v6)
+        sorted_keys = sorted(keys)
+        bloom = BloomFilter(capacity=max(len(digests), 1_000), error_rate=error_rate)
+        for digest in digests:
+            bloom.add(digest)
+
+        meta = json.dumps({
+            "labels": sorted(labels, key=labels.get),
+            "counts": {"ipv4": len(v4), "ipv6": len(v6), "keys": len(sorted_keys)},
+            "bloom": {"capacity": bloom.capacity, "num_bits": bloom.num_bits,
+                      "num_hashes": bloom.num_hashes, "error_rate": error_rate},
+            "feeds": [IOCSnapshot._feed_stat(feed) for feed in feeds],
+            "invalid": invalid,
+            "created": time.time()
+        }).encode("utf-8")
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            def write(data: bytes):
+                f.write(data)
+                f.write(bytes(_align(f.tell()) - f.tell()))
+
+            f.write(_HEADER.pack(_MAGIC, len(meta)))
+            write(meta)
+            for column in range(3):
+                write(array("I", (interval[column] for interval in v4)).tobytes())
+            for column in range(2):
+                write(b"".join(interval[column].to_bytes(16, "big") for interval in v6))
+            write(array("I", (interval[2] for interval in v6)).tobytes())
+            write(array("Q", sorted_keys).tobytes())
+            write(array("I", (keys[key] for key in sorted_keys)).tobytes())
+            write(bytes(bloom.bits))
+        os.replace(tmp, path)
+
+        return {"path": path, "ipv4_ranges": len(v4), "ipv6_ranges": len(v6),
+                "domains_and_hashes": len(sorted_keys), "labels": len(labels), "invalid": invalid}
+
+    @staticmethod
+    def _feed_stat(path: str) -> Dict:
+        stat = os.stat(path)
+        return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_current(self, feeds: Sequence[str]) -> bool:
+        """Whether the snapshot was built from feeds as they are now on disk"""
+        try:
+            return self.meta["feeds"] == [self._feed_stat(feed) for feed in feeds]
+        except OSError:
+            return False
+
+    def _lookup_range(self, table, key) -> Optional[str]:
+        starts, ends, labels = table
+        i = bisect_right(starts, key) - 1
+        if i >= 0 and key <= ends[i]:
+            return self.labels[labels[i]]
+        return None
+
+    def lookup_ip(self, value: str) -> Optional[str]:
+        try:
+            if ":" in value:
+                return self._lookup_range(self._v6, socket.inet_pton(socket.AF_INET6, value))
+            return self._lookup_range(self._v4, int.from_bytes(socket.inet_pton(socket.AF_INET, value), "big"))
+        except (OSError, TypeError):
+            return None
+
+    def _lookup_key(self, kind: str, value: str) -> Optional[str]:
+        digest = _digest(kind, value)
+        if digest not in self.bloom:
+            return None
+        key = _key(digest)
+        keys = self._keys
+        i = bisect_right(keys, key) - 1
+        if i >= 0 and keys[i] == key:
+            return self.labels[self._key_labels[i]]
+        return None
+
+    def lookup_domain(self, value: str) -> Optional[Tuple[str, str]]:
+        """(matched indicator, label) for value or its nearest listed parent domain"""
+        domain = value.lower().rstrip(".")
+        while "." in domain:
+            label = self._lookup_key("domain", domain)
+            if label is not None:
+                return domain, label
+            domain = domain.split(".", 1)[1]
+        return None
+
+    def lookup_hash(self, value: str) -> Optional[str]:
+        return self._lookup_key("hash", value.lower())
+
+    def stats(self) -> Dict:
+        counts = self.meta["counts"]
+        return {"ipv4_ranges": counts["ipv4"], "ipv6_ranges": counts["ipv6"],
+                "domains_and_hashes": counts["keys"], "labels": len(self.labels),
+                "invalid": self.meta["invalid"], "created": self.meta["created"]}
+
+    def close(self):
+        for name in ("_v4", "_v6", "_keys", "_key_labels", "bloom", "_view"):
+            self.__dict__.pop(name, None)
+        if getattr(self, "_mm", None) is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # A lookup still holds a view; the map goes away with it
+                pass
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ThreatIntelIndex:
+    """IOC enrichment for XDR events, backed by an IOCSnapshot.
+
+    The snapshot is reused while it matches the feed files and rebuilt
+    otherwise. reload() builds the new snapshot next to the old one and
+    swaps a single reference, so lookups running meanwhile finish on the
+    old snapshot and ingestion never waits; watch() does that from a
+    background thread, building in a worker process, whenever a feed
+    changes.
+    """
+
+    def __init__(self, feeds: Sequence[str], snapshot: str = ".cache/threat_intel.ioc",
+                 error_rate: float = 0.001):
+        self.feeds = list(feeds)
+        self.snapshot_path = snapshot
+        self.error_rate = error_rate
+        self.lookups = 0
+        self.hits = 0
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        current = None
+        if os.path.exists(snapshot):
+            try:
+                current = IOCSnapshot(snapshot)
+                if not current.is_current(self.feeds):
+                    current.close()
+                    current = None
+            except (ValueError, KeyError, struct.error):
+                current = None
+        if current is None:
+            IOCSnapshot.build(snapshot, self.feeds, error_rate)
+            current = IOCSnapshot(snapshot)
+        self.snapshot = current
+
+    def reload(self, force: bool = False, isolated: bool = False) -> bool:
+        """Rebuild from the feeds if they changed; True if a new snapshot is live.
+
+        isolated builds in a worker process, so a large rebuild does not
+        hold the GIL against the ingesting threads.
+        """
+        with self._lock:
+            if not force and self.snapshot.is_current(self.feeds):
+                return False
+            if isolated:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    pool.submit(IOCSnapshot.build, self.snapshot_path, self.feeds, self.error_rate).result()
+            else:
+                IOCSnapshot.build(self.snapshot_path, self.feeds, self.error_rate)
+            # Not closed here: lookups in flight may still hold the old
+            # snapshot, and its map is released with the last reference
+            self.snapshot = IOCSnapshot(self.snapshot_path)
+            self.reloads += 1
+        return True
+
+    def watch(self, interval: float = 30.0):
+        """Reload in a daemon thread whenever a feed file changes"""
+        if self._watcher is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    if self.reload(isolated=True):
+                        print(f"[*] Threat intel reloaded: {self.stats()}")
+                except (OSError, ValueError) as e:
+                    print(f"[!] Threat intel reload failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="threat-intel-reload", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def matches(self, data: Dict) -> List[Dict]:
+        snapshot = self.snapshot
+        found = []
+        for field in IP_FIELDS:
+            value = data.get(field)
+            if isinstance(value, str):
+                label = snapshot.lookup_ip(value)
+                if label is not None:
+                    found.append({"field": field, "type": "ip", "value": value, "feed": label})
+        for field in DOMAIN_FIELDS:
+            value = data.get(field)
+            if isinstance(value, str):
+                if field == "url":
+                    value = urlsplit(value if "//" in value else f"//{value}").hostname or ""
+                hit = snapshot.lookup_domain(value)
+                if hit is not None:
+                    found.append({"field": field, "type": "domain", "value": value,
+                                  "indicator": hit[0], "feed": hit[1]})
+        for field in HASH_FIELDS:
+            value = data.get(field)
+            if isinstance(value, str):
+                label = snapshot.lookup_hash(value)
+                if label is not None:
+                    found.append({"field": field, "type": "hash", "value": value, "feed": label})
+        return found
+
+    def enrich(self, event: XDEvent) -> List[Dict]:
+        """Add matching indicators to event.data["threat_intel"] and return them"""
+        found = self.matches(event.data)
+        self.lookups += 1
+        if found:
+            self.hits += 1
+            event.data["threat_intel"] = found
+        return found
+
+    def enrich_many(self, events: Iterable[XDEvent]) -> int:
+        return sum(1 for event in events if self.enrich(event))
+
+    def stats(self) -> Dict:
+        stats = self.snapshot.stats()
+        stats.update({"lookups": self.lookups, "hits": self.hits, "reloads": self.reloads})
+        return stats
+
+    def __len__(self) -> int:
+        counts = self.snapshot.meta["counts"]
+        return counts["ipv4"] + counts["ipv6"] + counts["keys"]
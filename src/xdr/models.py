@@ -0,0 +1,29 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class XDEvent:
+    source: str
+    event_type: str
+    data: Dict
+    confidence: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class ActionResult:
+    action: str
+    status: str
+
+
+@dataclass
+class Incident:
+    id: str
+    severity: str
+    rule: str
+    events: List[XDEvent]
+    actions_taken: List[ActionResult]
+    remediation_steps: List[str]
+    indicators_of_compromise: List[Dict]
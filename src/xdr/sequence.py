@@ -0,0 +1,311 @@
+import operator
+import re
+import shlex
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from src.xdr.correlation import CorrelationRule
+from src.xdr.dispatch import AlphaNetwork
+from src.xdr.models import Incident, XDEvent
+
+# Rule language, one statement per line ("#" starts a comment):
+#
+#   rule "AI attack chain"
+#     severity critical
+#     mitre TA0001
+#     by host                      join key: every step must share its value
+#     within 10m                   first to last step
+#     sequence
+#       ai:prompt_injection confidence>=0.8
+#       endpoint:credential_access user
+#       network:data_exfiltration @source_ip
+#   end
+#
+# A step is source:event_type ("*" matches anything) followed by conditions
+# on event.data (or on confidence): field, field=value, field!=value,
+# field>value, field>=value, field<value, field<=value. A bare field means
+# it must be present. @field joins that step on another field than the
+# rule's "by" key.
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h|d)?$")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, None: 1}
+_CONDITION = re.compile(r"^([A-Za-z_][\w.]*)(?:(==|=|!=|>=|<=|>|<)(.+))?$")
+_OPERATORS = {
+    "==": operator.eq, "!=": operator.ne,
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+}
+
+
+class RuleSyntaxError(ValueError):
+    def __init__(self, message: str, line: int):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def parse_duration(text: str) -> float:
+    match = _DURATION.match(text)
+    if not match:
+        raise ValueError(f"Bad duration: {text!r}")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+def _literal(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _condition(text: str) -> Tuple[str, Callable[[XDEvent], bool]]:
+    """(canonical key, test) for a step condition"""
+    match = _CONDITION.match(text)
+    if not match:
+        raise ValueError(f"Bad condition: {text!r}")
+    field, op, value = match.groups()
+    if op == "=":
+        op = "=="
+    key = field if op is None else f"{field}{op}{value}"
+    return key, _compile_condition(field, op, value)
+
+
+def _compile_condition(field: str, op: Optional[str], value: Optional[str]) -> Callable[[XDEvent], bool]:
+
+    if field == "confidence":
+        get = lambda event: event.confidence
+    else:
+        get = lambda event: event.data.get(field)
+
+    if op is None:
+        return lambda event: get(event) is not None
+
+    compare = _OPERATORS[op]
+    value = _literal(value)
+
+    def check(event: XDEvent) -> bool:
+        actual = get(event)
+        if actual is None:
+            return False
+        try:
+            return compare(actual, value)
+        except TypeError:
+            return compare(str(actual), str(value))
+    return check
+
+
+class Step:
+    """One NFA transition: source/type guard, data conditions and join key"""
+
+    def __init__(self, source: str, event_type: str,
+                 conditions: Sequence[Tuple[str, Callable[[XDEvent], bool]]] = (),
+                 key: Optional[str] = None, text: str = ""):
+        self.source = source
+        self.event_type = event_type
+        self.conditions = tuple(conditions)
+        self.key = key
+        self.text = text
+
+    def matches(self, event: XDEvent, alpha: AlphaNetwork = None) -> bool:
+        if alpha is not None:
+            return all(alpha.test(key, event) for key, _ in self.conditions)
+        return all(check(event) for _, check in self.conditions)
+
+    def __repr__(self):
+        return f"Step({self.text!r})"
+
+
+class SequenceNFA:
+    """Linear NFA over steps, indexed by (source, event_type) so an event only
+    tests the steps that could take it"""
+
+    def __init__(self, steps: Sequence[Step]):
+        if not steps:
+            raise ValueError("A sequence needs at least one step")
+        self.steps = list(steps)
+        self.index: Dict[Tuple[str, str], List[int]] = {}
+        for position, step in enumerate(self.steps):
+            self.index.setdefault((step.source, step.event_type), []).append(position)
+
+    def candidates(self, event: XDEvent) -> List[int]:
+        """Step positions event can advance, highest first"""
+        index = self.index
+        positions = []
+        for key in ((event.source, event.event_type), (event.source, "*"), ("*", event.event_type), ("*", "*")):
+            positions.extend(index.get(key, ()))
+        positions.sort(reverse=True)
+        return positions
+
+
+class SequenceRule(CorrelationRule):
+    """Ordered, time-bounded sequence matched per join-key value.
+
+    Partial matches live in one slot per NFA state for each entity: slot k
+    holds the run that has matched k steps and started latest, which
+    dominates every other run in that state (it has the most window left
+    and the same future). Memory is therefore O(entities * steps). Entities
+    whose newest activity falls out of the window expire oldest-first, and
+    max_entities caps how many are tracked at once.
+    """
+
+    def __init__(self, name, severity, mitre_technique, steps: Sequence[Step], key: str = "source_ip",
+                 window: float = 600.0, max_entities: int = 100_000):
+        super().__init__(name, severity, mitre_technique)
+        self.nfa = SequenceNFA(steps)
+        self.key = key
+        self.window = window
+        self.max_entities = max_entities
+        self.expired = 0
+        self.alpha: Optional[AlphaNetwork] = None
+        # join value -> [last activity, slots]; slots[k] = (start, events) or None
+        self._partial: "OrderedDict[object, list]" = OrderedDict()
+
+    @property
+    def steps(self) -> List[Step]:
+        return self.nfa.steps
+
+    def interests(self) -> Set[Tuple[str, str]]:
+        return {(step.source, step.event_type) for step in self.steps}
+
+    def bind(self, alpha: AlphaNetwork):
+        self.alpha = alpha
+        for step in self.steps:
+            for key, check in step.conditions:
+                alpha.register(key, check)
+
+    def _expire(self, now: float):
+        partial = self._partial
+        cutoff = now - self.window
+        while partial:
+            value, state = next(iter(partial.items()))
+            if state[0] >= cutoff and len(partial) <= self.max_entities:
+                break
+            del partial[value]
+            self.expired += 1
+
+    def update(self, event: XDEvent) -> List[Incident]:
+        positions = self.nfa.candidates(event)
+        if not positions:
+            return []
+
+        now = event.timestamp
+        self._expire(now)
+        cutoff = now - self.window
+        steps = self.nfa.steps
+        last = len(steps) - 1
+        partial = self._partial
+
+        # Highest step first, so one event never takes two steps of the same run
+        for position in positions:
+            step = steps[position]
+            value = event.data.get(step.key or self.key)
+            if value is None or not step.matches(event, self.alpha):
+                continue
+
+            state = partial.get(value)
+            if position == 0:
+                run = (now, (event,))
+            else:
+                previous = state[1][position] if state is not None else None
+                if previous is None or previous[0] < cutoff:
+                    continue
+                run = (previous[0], previous[1] + (event,))
+
+            if position == last:
+                partial.pop(value, None)
+                return [self.generate_incident(list(run[1]))]
+
+            if state is None:
+                state = partial[value] = [now, [None] * len(steps)]
+            else:
+                partial.move_to_end(value)
+                state[0] = now
+
+            slot = state[1][position + 1]
+            if slot is None or slot[0] <= run[0]:
+                state[1][position + 1] = run
+        return []
+
+    def state_size(self) -> int:
+        return len(self._partial)
+
+    def partial_matches(self) -> int:
+        return sum(1 for _, slots in self._partial.values() for slot in slots if slot is not None)
+
+
+def _tokens(line: str) -> List[str]:
+    return shlex.split(line, comments=True)
+
+
+def compile_rules(text: str) -> List[SequenceRule]:
+    """Compile rule-language text into SequenceRules"""
+    rules: List[SequenceRule] = []
+    current: Optional[Dict] = None
+    in_sequence = False
+
+    for number, raw in enumerate(text.splitlines(), 1):
+        try:
+            tokens = _tokens(raw)
+        except ValueError as e:
+            raise RuleSyntaxError(str(e), number)
+        if not tokens:
+            continue
+
+        keyword = tokens[0].lower()
+        try:
+            if current is None:
+                if keyword != "rule" or len(tokens) != 2:
+                    raise ValueError('expected: rule "<name>"')
+                current = {"name": tokens[1], "severity": "high", "mitre": "", "key": "source_ip",
+                           "window": 600.0, "steps": [], "line": number}
+                in_sequence = False
+            elif keyword == "end":
+                if not current["steps"]:
+                    raise ValueError(f"rule {current['name']!r} has no sequence steps")
+                rules.append(SequenceRule(current["name"], current["severity"], current["mitre"],
+                                          current["steps"], key=current["key"], window=current["window"]))
+                current = None
+            elif keyword == "sequence" and len(tokens) == 1:
+                in_sequence = True
+            elif in_sequence:
+                current["steps"].append(_step(tokens, raw.strip()))
+            elif keyword == "severity" and len(tokens) == 2:
+                current["severity"] = tokens[1].lower()
+            elif keyword == "mitre" and len(tokens) == 2:
+                current["mitre"] = tokens[1]
+            elif keyword == "by" and len(tokens) == 2:
+                current["key"] = tokens[1]
+            elif keyword == "within" and len(tokens) == 2:
+                current["window"] = parse_duration(tokens[1])
+            else:
+                raise ValueError(f"unexpected {raw.strip()!r}")
+        except ValueError as e:
+            if isinstance(e, RuleSyntaxError):
+                raise
+            raise RuleSyntaxError(str(e), number)
+
+    if current is not None:
+        raise RuleSyntaxError(f"rule {current['name']!r} is missing 'end'", current["line"])
+    return rules
+
+
+def _step(tokens: List[str], text: str) -> Step:
+    source, sep, event_type = tokens[0].partition(":")
+    if not sep or not source or not event_type:
+        raise ValueError(f"expected source:event_type, got {tokens[0]!r}")
+
+    key = None
+    conditions = []
+    for token in tokens[1:]:
+        if token.startswith("@"):
+            key = token[1:]
+        else:
+            conditions.append(_condition(token))
+    return Step(source, event_type, conditions, key=key, text=text)
+
+
+def load_rules(path: str) -> List[SequenceRule]:
+    with open(path, "r") as f:
+        return compile_rules(f.read())
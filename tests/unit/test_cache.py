@@ -0,0 +1,45 @@
+from src.core.cache import ResponseCache
+
+
+def test_key_covers_every_input():
+    base = ResponseCache.make_key("openai", "gpt-4", "sys", "payload", {"temperature": 0.1})
+
+    assert base == ResponseCache.make_key("openai", "gpt-4", "sys", "payload", {"temperature": 0.1})
+    assert base != ResponseCache.make_key("openai", "gpt-4", "sys", "payload", {"temperature": 0.2})
+    assert base != ResponseCache.make_key("ollama", "gpt-4", "sys", "payload", {"temperature": 0.1})
+
+
+def test_hits_survive_reopen_and_refresh_bypasses(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("k", "response")
+    cache.close()
+
+    cache = ResponseCache(path)
+    assert cache.get("k") == "response"
+    assert cache.stats()["hits"] == 1
+    cache.close()
+
+    cache = ResponseCache(path, refresh=True)
+    assert cache.get("k") is None
+    cache.close()
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=-1)
+    cache.put("k", "response")
+
+    assert cache.get("k") is None
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=25)
+    cache.put("old", "x" * 10)
+    cache.put("used", "y" * 10)
+    cache.get("used")
+    cache.put("new", "z" * 10)
+
+    assert cache.get("old") is None
+    assert cache.get("used") == "y" * 10
+    assert cache.stats()["evictions"] == 1
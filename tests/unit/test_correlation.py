@@ -0,0 +1,64 @@
+from src.xdr.correlation import CorrelationEngine, WindowedRule
+from src.xdr.models import XDEvent
+
+
+def event(source, event_type, at, **data):
+    return XDEvent(source=source, event_type=event_type, data=data, timestamp=at)
+
+
+def rule(window=60.0):
+    return WindowedRule("chain", "high", "TA0001", sources=["ai", "endpoint"],
+                        event_types=["credential_access"], window=window)
+
+
+def test_fires_once_every_feature_is_seen_for_one_entity():
+    r = rule()
+
+    assert r.update(event("ai", "prompt_injection", 0, host="h1")) == []
+    assert r.update(event("endpoint", "credential_access", 10, host="h2")) == []
+    incidents = r.update(event("endpoint", "credential_access", 20, host="h1", source_ip="10.0.0.1"))
+
+    assert len(incidents) == 1
+    assert [e.timestamp for e in incidents[0].events] == [0, 20]
+    assert incidents[0].indicators_of_compromise[0]["value"] == "10.0.0.1"
+    # State for h1 resets after firing; h2 and the new source_ip entity remain
+    assert r.state_size() == 2
+
+
+def test_features_older_than_the_window_do_not_count():
+    r = rule(window=60.0)
+
+    r.update(event("ai", "prompt_injection", 0, host="h1"))
+    assert r.update(event("endpoint", "credential_access", 100, host="h1")) == []
+    assert r.update(event("ai", "prompt_injection", 120, host="h1"))
+
+
+def test_idle_entities_are_evicted():
+    r = rule(window=60.0)
+
+    for i in range(10):
+        r.update(event("ai", "prompt_injection", i, host=f"h{i}"))
+    r.update(event("ai", "prompt_injection", 65, host="late"))
+
+    assert r.state_size() == 6
+
+
+def test_events_without_required_features_are_ignored():
+    r = rule()
+
+    assert r.update(event("network", "dns", 0, host="h1")) == []
+    assert r.state_size() == 0
+
+
+def test_engine_collects_incidents_and_stats():
+    engine = CorrelationEngine([rule()])
+
+    incidents = engine.process_many([
+        event("ai", "prompt_injection", 0, host="h1"),
+        event("endpoint", "credential_access", 5, host="h1"),
+    ])
+    stats = engine.stats()
+
+    assert len(incidents) == 1
+    assert stats["events"] == 2 and stats["incidents"] == 1
+    assert stats["rule_stats"]["chain"]["incidents"] == 1
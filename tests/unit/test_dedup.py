@@ -0,0 +1,46 @@
+from src.attacks.dedup import DedupIndex, normalize_payload, recordable_payloads
+from src.core.real_tester import RealAITester
+
+
+def test_normalization_ignores_case_width_and_spacing():
+    assert normalize_payload("  Ignore\tALL  previous ") == normalize_payload("ｉｇｎｏｒｅ all previous")
+
+
+def test_seen_payloads_persist_across_runs(tmp_path):
+    path = str(tmp_path / "index.sqlite")
+    index = DedupIndex(path, bloom=True, bloom_capacity=1_000)
+    assert index.unseen(["a", "A ", "b"]) == ["a", "b"]
+    index.add_many(["a"], source="scan")
+    index.close()
+
+    index = DedupIndex(path, bloom=True, bloom_capacity=1_000)
+    assert index.unseen(["a", "b", "c"]) == ["b", "c"]
+    assert "A" in index
+    assert len(index) == 1
+    index.close()
+
+
+def test_filter_records_only_what_was_consumed(tmp_path):
+    index = DedupIndex(str(tmp_path / "index.sqlite"))
+
+    stream = index.filter(["p1", "p2", "p3"], batch_size=10)
+    assert next(stream) == "p1"
+    stream.close()
+
+    assert "p1" in index
+    assert "p2" not in index
+    index.close()
+
+
+def test_simulated_findings_are_not_recorded_as_tested(monkeypatch):
+    def down(self, *args, **kwargs):
+        raise Exception("Ollama not running on localhost:11434")
+
+    tester = RealAITester(demo_mode=False)
+    monkeypatch.setattr(RealAITester, "_query_ollama", down)
+    offline = tester.test_local_ollama("t", ["p1"], limit=None)
+    demo = RealAITester()._build_finding("llama2", "p2", "Sure.", 0)
+    real = tester._build_finding("llama2", "p3", "Sure.", 0)
+
+    assert offline[0]["simulated"] and demo["simulated"]
+    assert recordable_payloads(offline + [demo, real, real]) == ["p3"]
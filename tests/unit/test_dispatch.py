@@ -0,0 +1,86 @@
+from src.xdr.correlation import CorrelationEngine, CorrelationRule
+from src.xdr.dispatch import ANY, AlphaNetwork, RuleIndex
+from src.xdr.models import XDEvent
+from src.xdr.sequence import compile_rules
+
+RULES = """
+rule "injection then exfiltration"
+  sequence
+    ai:prompt_injection confidence>=0.8
+    network:data_exfiltration
+end
+
+rule "injection then credentials"
+  sequence
+    ai:prompt_injection confidence>=0.8
+    endpoint:credential_access
+end
+"""
+
+
+class Recorder(CorrelationRule):
+    def __init__(self, name, interests):
+        super().__init__(name, "low", "")
+        self._interests = interests
+        self.seen = []
+
+    def interests(self):
+        return self._interests
+
+    def update(self, event):
+        self.seen.append(event.event_type)
+        return []
+
+
+def event(source, event_type, confidence=0.0, **data):
+    return XDEvent(source=source, event_type=event_type, data=data, confidence=confidence)
+
+
+def test_candidates_union_wildcards_in_rule_order():
+    index = RuleIndex()
+    index.add("exact", {("ai", "prompt_injection")})
+    index.add("any_type", {("ai", ANY)})
+    index.add("any_source", {(ANY, "prompt_injection")})
+    index.add("everything", {(ANY, ANY)})
+    index.add("other", {("network", "dns")})
+
+    assert index.candidates("ai", "prompt_injection") == ("exact", "any_type", "any_source", "everything")
+    assert index.candidates("endpoint", "login") == ("everything",)
+
+    index.add("late", {("endpoint", ANY)})
+    assert index.candidates("endpoint", "login") == ("everything", "late")
+
+
+def test_engine_only_runs_interested_rules():
+    ai = Recorder("ai", {("ai", ANY)})
+    dns = Recorder("dns", {("network", "dns")})
+    engine = CorrelationEngine([ai, dns])
+
+    engine.process_many([event("ai", "prompt_injection"), event("network", "dns"), event("network", "http")])
+
+    assert ai.seen == ["prompt_injection"]
+    assert dns.seen == ["dns"]
+    assert engine.rule_stats["ai"]["evaluations"] == 1
+
+
+def test_shared_conditions_are_one_node_evaluated_once_per_event():
+    engine = CorrelationEngine(compile_rules(RULES))
+
+    engine.process(event("ai", "prompt_injection", confidence=0.9, source_ip="10.0.0.1"))
+    incidents = engine.process(event("endpoint", "credential_access", source_ip="10.0.0.1"))
+    alpha = engine.stats()["alpha"]
+
+    assert len(incidents) == 1
+    assert alpha["nodes"] == 1 and alpha["shared_nodes"] == 1
+    assert alpha["evaluations"] == 1 and alpha["reused"] == 1
+
+
+def test_alpha_memo_resets_per_event():
+    alpha = AlphaNetwork()
+    key = alpha.register("confidence>=0.8", lambda e: e.confidence >= 0.8)
+
+    alpha.begin(event("ai", "x", confidence=0.9))
+    assert alpha.test(key, event("ai", "x", confidence=0.9))
+    alpha.begin(event("ai", "x", confidence=0.1))
+    assert not alpha.test(key, event("ai", "x", confidence=0.1))
+    assert alpha.evaluations == 2
@@ -0,0 +1,41 @@
+from src.core.fanout import ProviderFanout
+from src.core.ratelimit import get_rate_limiter
+
+
+class FakeTester:
+    def __init__(self):
+        self.rate_limiter = get_rate_limiter()
+        self.limiters = []
+
+    def test_payload(self, system_prompt, payload, model, index=0, timeout=None):
+        self.limiters.append(self.rate_limiter)
+        if payload == "boom":
+            raise RuntimeError("backend down")
+        return {"provider": "ollama", "model": model, "payload": payload, "vulnerable": False}
+
+
+def test_each_run_returns_only_its_findings():
+    fanout = ProviderFanout([("ollama", "a"), ("ollama", "b")], tester=FakeTester())
+
+    first = fanout.run("prompt", ["p1", "p2"])
+    second = fanout.run("prompt", ["p3", "boom"])
+
+    assert sorted((f["model"], f["payload"]) for f in first) == [("a", "p1"), ("a", "p2"), ("b", "p1"), ("b", "p2")]
+    assert sorted(f["payload"] for f in second) == ["p3", "p3"]
+    assert len(fanout.results) == 6
+    assert fanout.lane_stats["ollama/a"] == {"submitted": 4, "completed": 4, "errors": 1,
+                                             "seconds": fanout.lane_stats["ollama/a"]["seconds"]}
+
+
+def test_rate_limits_leave_the_shared_limiter_and_clients_alone():
+    shared = get_rate_limiter()
+    before = dict(shared.limits)
+    tester = FakeTester()
+
+    fanout = ProviderFanout([("ollama", "a")], tester=tester, rate_limits={"ollama": (7, None)})
+    fanout.run("prompt", ["p1"])
+
+    assert shared.limits == before
+    assert tester.limiters == [fanout.rate_limiter]
+    assert tester.rate_limiter is shared
+    assert fanout.rate_limiter.limits["ollama"] == (7, None)
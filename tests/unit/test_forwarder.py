@@ -0,0 +1,137 @@
+import gzip
+import json
+import threading
+import time
+from email.utils import formatdate
+
+from src.xdr.forwarder import SIEMForwarder
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class FakeCollector:
+    """Answers with the given statuses in turn (the last one repeats)"""
+
+    def __init__(self, *statuses, gate=None):
+        self.statuses = list(statuses) or [200]
+        self.gate = gate
+        self.records = []
+
+    def post(self, url, data=None, **kwargs):
+        if self.gate is not None:
+            self.gate.wait()
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        if isinstance(status, FakeResponse):
+            return status
+        if status < 300:
+            self.records.extend(json.loads(line) for line in gzip.decompress(data).splitlines())
+        return FakeResponse(status)
+
+
+def forwarder(tmp_path, transport, **kwargs):
+    options = dict(flush_interval=0.01, backoff=0.01, max_backoff=0.05, spool_dir=str(tmp_path / "spool"))
+    options.update(kwargs)
+    return SIEMForwarder("http://siem.test/ingest", transport=transport, **options)
+
+
+def test_records_arrive_batched(tmp_path):
+    collector = FakeCollector(200)
+    with forwarder(tmp_path, collector, batch_size=10) as siem:
+        assert siem.submit_many({"n": i} for i in range(25)) == 25
+        assert siem.flush(5)
+
+        metrics = siem.metrics()
+
+    assert [r["n"] for r in collector.records] == list(range(25))
+    assert metrics["batches_sent"] >= 3
+
+
+def test_outage_spools_and_next_run_drains(tmp_path):
+    siem = forwarder(tmp_path, FakeCollector(503))
+    siem.submit({"n": 1})
+    assert siem.flush(5)
+    siem.close()
+    assert siem.metrics()["spool_batches"] == 1
+
+    collector = FakeCollector(200)
+    with forwarder(tmp_path, collector) as siem:
+        siem.submit({"n": 2})
+        assert siem.flush(5)
+
+    assert sorted(r["n"] for r in collector.records) == [1, 2]
+    assert siem.metrics()["spool_batches"] == 0
+
+
+def test_full_spool_saturates_the_queue(tmp_path):
+    gate = threading.Event()
+    siem = forwarder(tmp_path, FakeCollector(200, gate=gate), max_queue=1, batch_size=1, spool_limit=1)
+    try:
+        # The sender ends up stuck on the gated SIEM with the spool full
+        accepted = 0
+        while siem.submit({"n": accepted}, timeout=0.05):
+            accepted += 1
+            assert accepted < 10
+
+        assert siem.flush(timeout=0.05) is False
+    finally:
+        gate.set()
+        siem.close()
+
+
+def test_outage_spills_instead_of_blocking_submit(tmp_path, monkeypatch):
+    def no_sleep(seconds):
+        raise AssertionError("the sender slept on a live batch")
+
+    collector = FakeCollector(503)
+    siem = forwarder(tmp_path, collector, max_queue=4, batch_size=2, backoff=60.0, max_backoff=60.0)
+    monkeypatch.setattr("src.xdr.forwarder.time.sleep", no_sleep)
+    try:
+        for n in range(40):
+            assert siem.submit({"n": n}, timeout=1.0)
+        assert siem.flush(5)
+        metrics = siem.metrics()
+    finally:
+        siem.close()
+
+    assert metrics["spooled_batches"] >= 20
+    assert not metrics["siem_up"]
+    assert collector.records == []
+
+
+def test_retry_after_http_date_holds_sends(tmp_path):
+    retry_at = formatdate(time.time() + 10, usegmt=True)
+    collector = FakeCollector(FakeResponse(429, {"Retry-After": retry_at}), 200)
+    siem = forwarder(tmp_path, collector, max_backoff=30.0)
+    try:
+        siem.submit({"n": 1})
+        assert siem.flush(5)
+        held = siem._down_until - time.monotonic()
+        assert siem.metrics()["spool_batches"] == 1
+    finally:
+        siem.close()
+
+    assert 5.0 < held <= 10.0
+    assert collector.records == []
+
+
+def test_production_xdr_forwards_scan_events(tmp_path):
+    from integrate_xdr import ProductionXDR
+
+    collector = FakeCollector(200)
+    xdr = ProductionXDR()
+    xdr.forwarder = forwarder(tmp_path, collector)
+    xdr.process_security_scan("https://api.example.test/v1", [
+        {"vulnerable": True, "severity": "critical", "payload": "Ignore safety", "confidence": 0.9},
+        {"vulnerable": False, "payload": "Hello"}
+    ])
+    xdr.close()
+
+    assert len(collector.records) == 1
+    assert collector.records[0]["event"]["event_type"] == "prompt_injection"
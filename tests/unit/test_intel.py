@@ -0,0 +1,66 @@
+import time
+
+from src.utils.bloom import BloomFilter
+from src.xdr.intel import ThreatIntelIndex
+from src.xdr.models import XDEvent
+
+FEED = """# test feed
+10.0.0.0/8 internal-wide
+10.1.2.0/24 internal-narrow
+2001:db8::/32 doc-v6
+evil.example.com c2
+4f0c8e1d6b0a2c9e7d3b5a1f8e6c4d2b stealer
+"""
+
+
+def intel(tmp_path, feed=FEED):
+    path = tmp_path / "feed.txt"
+    path.write_text(feed)
+    return ThreatIntelIndex([str(path)], snapshot=str(tmp_path / "intel.ioc")), path
+
+
+def test_bloom_filter_has_no_false_negatives(tmp_path):
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    keys = [i.to_bytes(4, "little") for i in range(1_000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert sum(i.to_bytes(4, "big") + b"x" in bloom for i in range(1_000)) < 50
+
+    bloom.save(str(tmp_path / "bloom"))
+    assert all(key in BloomFilter.load(str(tmp_path / "bloom")) for key in keys)
+
+
+def test_narrowest_cidr_domain_parents_and_hashes(tmp_path):
+    index, _ = intel(tmp_path)
+    snapshot = index.snapshot
+
+    assert snapshot.lookup_ip("10.1.2.3") == "internal-narrow"
+    assert snapshot.lookup_ip("10.200.0.1") == "internal-wide"
+    assert snapshot.lookup_ip("11.0.0.1") is None
+    assert snapshot.lookup_ip("2001:db8::1") == "doc-v6"
+    assert snapshot.lookup_domain("cdn.evil.example.com") == ("evil.example.com", "c2")
+    assert snapshot.lookup_domain("example.com") is None
+    assert snapshot.lookup_hash("4F0C8E1D6B0A2C9E7D3B5A1F8E6C4D2B") == "stealer"
+
+
+def test_enrich_tags_event_fields(tmp_path):
+    index, _ = intel(tmp_path)
+    event = XDEvent("network", "data_exfiltration", {"dest_ip": "10.1.2.9", "url": "https://evil.example.com/x"})
+
+    found = index.enrich(event)
+
+    assert {m["type"] for m in found} == {"ip", "domain"}
+    assert event.data["threat_intel"] == found
+
+
+def test_reload_picks_up_a_changed_feed(tmp_path):
+    index, path = intel(tmp_path)
+    assert not index.reload()
+
+    time.sleep(0.01)
+    path.write_text(FEED + "192.0.2.7 new-scanner\n")
+
+    assert index.reload()
+    assert index.snapshot.lookup_ip("192.0.2.7") == "new-scanner"
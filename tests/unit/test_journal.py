@@ -0,0 +1,70 @@
+import requests
+
+from src.core.journal import ScanJournal
+from src.core.real_tester import RealAITester
+
+TARGET = "You are helpful."
+
+
+class DownTransport:
+    session = None
+
+    def post(self, url, **kwargs):
+        raise requests.exceptions.ConnectionError("connection refused")
+
+
+class NoLimit:
+    def acquire(self, *args, **kwargs):
+        pass
+
+    def record(self, *args, **kwargs):
+        pass
+
+
+def finding(payload):
+    return {"provider": "ollama", "model": "llama2", "payload": payload, "vulnerable": False}
+
+
+def test_resume_after_torn_line_keeps_later_records(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ScanJournal(path)
+    journal.record(TARGET, "ollama", "llama2", "p1", finding("p1"))
+    journal.record(TARGET, "ollama", "llama2", "p2", finding("p2"))
+    journal.close()
+
+    with open(path, "rb+") as f:
+        f.truncate(len(f.read()) - 10)
+
+    journal = ScanJournal(path, resume=True)
+    assert journal.get(TARGET, "ollama", "llama2", "p2") is None
+    journal.record(TARGET, "ollama", "llama2", "p3", finding("p3"))
+    journal.close()
+
+    journal = ScanJournal(path, resume=True)
+    assert journal.get(TARGET, "ollama", "llama2", "p1") is not None
+    assert journal.get(TARGET, "ollama", "llama2", "p3") is not None
+    assert len(journal) == 2
+    journal.close()
+
+
+def test_plan_survives_resume(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ScanJournal(path)
+    journal.set_plan(payloads=["p1", "p2"])
+    journal.close()
+
+    journal = ScanJournal(path, resume=True)
+    assert journal.plan["payloads"] == ["p1", "p2"]
+    journal.close()
+
+
+def test_failed_query_is_not_journaled(tmp_path):
+    journal = ScanJournal(str(tmp_path / "journal.jsonl"))
+    tester = RealAITester(transport=DownTransport(), rate_limiter=NoLimit(), journal=journal)
+
+    tester.test_payload(TARGET, "p1", model="llama2")
+    tester.test_local_ollama(TARGET, ["p2"], model="llama2")
+
+    assert journal.get(TARGET, "ollama", "llama2", "p1") is None
+    assert journal.get(TARGET, "ollama", "llama2", "p2") is None
+    journal.close()
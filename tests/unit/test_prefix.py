@@ -0,0 +1,64 @@
+import pytest
+
+from src.core.prefix import PrefixReuse, latency_summary
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeTransport:
+    def __init__(self, body=None):
+        self.posts = []
+        self.body = {"context": [1, 2, 3]} if body is None else body
+
+    def post(self, url, json=None, **kwargs):
+        self.posts.append((url, json))
+        return FakeResponse(self.body)
+
+
+def test_ollama_primes_once_per_model_and_prompt():
+    transport = FakeTransport()
+    prefix = PrefixReuse(transport)
+
+    for payload in ("p1", "p2"):
+        url, body, field = prefix.build_request("llama2", "You are helpful.", payload, False, 5)
+    prefix.build_request("llama2", "Another prompt.", "p3", False, 5)
+
+    assert prefix.primed == 2
+    prime = transport.posts[0][1]
+    assert prime["options"] == {"num_predict": 0}
+    assert prime["system"] == "You are helpful." and "raw" not in prime
+    assert (url, field) == ("http://localhost:11434/api/generate", "response")
+    assert body["context"] == [1, 2, 3] and body["prompt"] == "p2" and "raw" not in body
+
+
+def test_ollama_prime_without_context_raises():
+    prefix = PrefixReuse(FakeTransport({"response": ""}))
+
+    with pytest.raises(RuntimeError):
+        prefix.build_request("llama2", "You are helpful.", "p1", False, 5)
+    assert prefix.primed == 0
+
+
+def test_llamacpp_sends_the_shared_prefix_with_cache_prompt():
+    prefix = PrefixReuse(FakeTransport(), backend="llamacpp")
+
+    url, body, field = prefix.build_request("any", "You are helpful.", "p1", True, 5)
+
+    assert url == "http://localhost:8080/completion" and field == "content"
+    assert body["prompt"] == PrefixReuse.prefix_text("You are helpful.") + "p1"
+    assert body["cache_prompt"] and body["stream"]
+
+
+def test_latency_summary():
+    summary = latency_summary([float(ms) for ms in range(1, 101)])
+
+    assert summary == {"count": 100, "mean_ms": 50.5, "p50_ms": 51.0, "p95_ms": 96.0}
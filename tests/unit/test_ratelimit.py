@@ -0,0 +1,42 @@
+from email.utils import formatdate
+import time
+
+from src.core.ratelimit import AdaptiveRateLimiter, parse_duration
+
+
+def test_parse_duration_formats():
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == 0.02
+    assert 25 < parse_duration(formatdate(time.time() + 30, usegmt=True)) <= 30
+    assert parse_duration("soon") is None
+
+
+def test_429_halves_the_rate_and_honors_retry_after():
+    limiter = AdaptiveRateLimiter({"openai": (600, None)})
+
+    limiter.record("openai", "gpt-4", 429, {"Retry-After": "2"})
+
+    state = limiter._get("openai", "gpt-4")
+    assert limiter.stats()["openai/gpt-4"]["rpm"] == 300
+    assert 1.5 < state.blocked_until - time.monotonic() <= 2
+
+
+def test_unlimited_provider_gets_a_bucket_once_throttled():
+    limiter = AdaptiveRateLimiter()
+
+    assert limiter.acquire("ollama", "llama2") == 0
+    limiter.record("ollama", "llama2", 429, {"retry-after-ms": "10"})
+
+    assert limiter.stats()["ollama/llama2"]["throttled"] == 1
+    assert limiter.stats()["ollama/llama2"]["rpm"] is not None
+
+
+def test_headers_set_limits_per_model():
+    limiter = AdaptiveRateLimiter()
+
+    limiter.record("openai", "gpt-4", 200, {"x-ratelimit-limit-requests": "100", "x-ratelimit-limit-tokens": "5000"})
+
+    assert limiter.stats()["openai/gpt-4"]["rpm"] == 100
+    assert limiter.stats()["openai/gpt-4"]["tpm"] == 5000
+    assert "openai/gpt-3.5-turbo" not in limiter.stats()
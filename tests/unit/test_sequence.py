@@ -0,0 +1,92 @@
+import pytest
+
+from src.xdr.models import XDEvent
+from src.xdr.sequence import RuleSyntaxError, compile_rules, parse_duration
+
+CHAIN = """
+rule "AI-initiated credential theft and exfiltration"
+  severity critical
+  mitre TA0010
+  by host
+  within 30m
+  sequence
+    ai:prompt_injection confidence>=0.8
+    endpoint:credential_access user
+    network:data_exfiltration @source_ip
+end
+"""
+
+
+def event(source, event_type, at, confidence=0.0, **data):
+    return XDEvent(source=source, event_type=event_type, data=data, confidence=confidence, timestamp=at)
+
+
+def chain():
+    return compile_rules(CHAIN)[0]
+
+
+def test_compiles_header_and_steps():
+    rule = chain()
+
+    assert (rule.name, rule.severity, rule.mitre_technique) == (
+        "AI-initiated credential theft and exfiltration", "critical", "TA0010")
+    assert rule.key == "host" and rule.window == 1800
+    assert [s.key for s in rule.steps] == [None, None, "source_ip"]
+    assert [c for c, _ in rule.steps[0].conditions] == ["confidence>=0.8"]
+
+
+def test_steps_must_match_in_order_within_the_window():
+    rule = chain()
+
+    assert rule.update(event("endpoint", "credential_access", 0, host="h1", user="bob")) == []
+    assert rule.update(event("ai", "prompt_injection", 1, confidence=0.5, host="h1")) == []
+    assert rule.update(event("ai", "prompt_injection", 2, confidence=0.9, host="h1")) == []
+    assert rule.update(event("endpoint", "credential_access", 3, host="h1")) == []
+    assert rule.update(event("endpoint", "credential_access", 4, host="h1", user="bob")) == []
+    incidents = rule.update(event("network", "data_exfiltration", 5, source_ip="h1"))
+
+    assert len(incidents) == 1
+    assert [e.timestamp for e in incidents[0].events] == [2, 4, 5]
+    assert rule.state_size() == 0
+
+
+def test_partial_matches_expire():
+    rule = chain()
+
+    rule.update(event("ai", "prompt_injection", 0, confidence=0.9, host="h1"))
+    rule.update(event("endpoint", "credential_access", 10, host="h1", user="bob"))
+    assert rule.update(event("network", "data_exfiltration", 2000, source_ip="h1")) == []
+    assert rule.expired == 1
+
+
+def test_one_slot_per_state_keeps_the_latest_run():
+    rule = chain()
+
+    for at in range(5):
+        rule.update(event("ai", "prompt_injection", at, confidence=0.9, host="h1"))
+
+    assert rule.partial_matches() == 1
+    rule.update(event("endpoint", "credential_access", 10, host="h1", user="bob"))
+    incident = rule.update(event("network", "data_exfiltration", 11, source_ip="h1"))[0]
+    assert incident.events[0].timestamp == 4
+
+
+def test_parse_duration():
+    assert parse_duration("250ms") == 0.25
+    assert parse_duration("10m") == 600
+    assert parse_duration("2") == 2
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+@pytest.mark.parametrize("text, line", [
+    ('rule "x"\n  sequence\n    ai\nend', 3),
+    ('rule "x"\n  within forever\nend', 2),
+    ('rule "x"\nend', 2),
+    ('rule "x"\n  sequence\n    ai:prompt_injection', 1),
+    ('severity high', 1),
+])
+def test_syntax_errors_report_their_line(text, line):
+    with pytest.raises(RuleSyntaxError) as error:
+        compile_rules(text)
+    assert error.value.line == line
@@ -0,0 +1,45 @@
+import hashlib
+import os
+
+from src.attacks.grammar import PayloadGrammar
+from src.attacks.sharding import generate_sharded, iter_shards, plan_shards
+
+
+def test_plan_covers_the_range_without_overlap():
+    ranges = plan_shards(10, 3)
+
+    assert [len(r) for r in ranges] == [4, 3, 3]
+    assert [i for r in ranges for i in r] == list(range(10))
+    assert len(plan_shards(2, 8)) == 2
+
+
+def test_shards_match_a_single_stream(tmp_path):
+    manifest = generate_sharded(100, str(tmp_path / "sharded"), shards=4, workers=1, seed=5)
+
+    payloads = list(iter_shards(manifest["path"]))
+
+    assert manifest["count"] == 100
+    assert payloads == list(PayloadGrammar().sample(100, seed=5))
+
+
+def test_compressed_shards_hash_their_text(tmp_path):
+    manifest = generate_sharded(30, str(tmp_path / "sharded"), shards=2, workers=2, seed=1, compress=True)
+
+    shard = manifest["shards"][0]
+    text = "".join(p + "\n" for p in list(iter_shards(manifest["path"]))[:shard["count"]])
+
+    assert shard["file"].endswith(".txt.gz")
+    assert hashlib.sha256(text.encode("utf-8")).hexdigest() == shard["sha256"]
+    assert os.path.exists(os.path.join(tmp_path, "sharded", "manifest.json"))
+
+
+def test_small_corpora_skip_the_process_pool(tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started for a small corpus")
+
+    monkeypatch.setattr("src.attacks.sharding.ProcessPoolExecutor", no_pool)
+
+    manifest = generate_sharded(1_000, str(tmp_path / "sharded"), shards=4, workers=4, seed=2)
+
+    assert manifest["count"] == 1_000
+    assert len(manifest["shards"]) == 4
@@ -0,0 +1,37 @@
+import socket
+
+from src.core.transport import DNSCache, HTTPTransport
+
+
+def test_building_a_transport_leaves_the_resolver_alone():
+    resolver = socket.getaddrinfo
+
+    transport = HTTPTransport()
+
+    assert socket.getaddrinfo is resolver
+    assert transport.dns_cache is None
+    transport.close()
+
+
+def test_opt_in_dns_cache_is_removed_on_close():
+    resolver = socket.getaddrinfo
+
+    transport = HTTPTransport(dns_ttl=60)
+    assert socket.getaddrinfo == transport.dns_cache.getaddrinfo
+    transport.close()
+
+    assert socket.getaddrinfo is resolver
+
+
+def test_dns_cache_hits_and_evicts():
+    calls = []
+    cache = DNSCache(ttl=60, max_entries=1)
+    cache._resolve = lambda *key: calls.append(key) or [key]
+
+    cache.getaddrinfo("a.example", 443)
+    cache.getaddrinfo("a.example", 443)
+    cache.getaddrinfo("b.example", 443)
+    cache.getaddrinfo("a.example", 443)
+
+    assert cache.hits == 1
+    assert len(calls) == 3
@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 import argparse
+import glob
+import json
+import os
 import sys
 import time
 from datetime import datetime
+from itertools import chain
 from src.utils.terminal_dash import TerminalDashboard
 from src.attacks.generator import PayloadGenerator
+from src.attacks.sharding import generate_sharded
+from src.attacks.dedup import DedupIndex, recordable_payloads
+from src.attacks.payloads import PayloadLibrary, load_payloads
+from src.attacks.clustering import scan_by_cluster
+from src.attacks.fuzzer import EvolutionaryFuzzer
 from src.core.real_tester import RealAITester
+from src.core.cache import ResponseCache
+from src.core.prefix import PrefixReuse
+from src.core.journal import ScanJournal
+from src.core.distributed import WorkQueue, ScanWorker, merge_results
+from src.core.exploiter import AIExploiter
+from src.core.fanout import ProviderFanout
+from src.core.bandit import PayloadBandit
+from src.core.analyzer import SEVERITY_ORDER
 
 def main():
     parser = argparse.ArgumentParser(
@@ -15,8 +32,15 @@ def main():
 Examples:
   %(prog)s scan --target "You are a helpful assistant"
   %(prog)s scan --file prompt.txt --output report.md
+  %(prog)s scan --file prompt.txt --live --bandit --budget 20
+  %(prog)s scan --file prompt.txt --prefix-reuse ollama --benchmark-prefix --budget 20
   %(prog)s generate --count 20 --save
+  %(prog)s generate --count 240 --shards 4 --compress
+  %(prog)s library build --generate 5000
+  %(prog)s library query --technique role_hijack --obfuscated --unseen-days 7
   %(prog)s test --provider ollama --model llama2
+  %(prog)s coordinate --queue /shared/scan.db --target "You are..." --model ollama:llama2 --wait
+  %(prog)s worker --queue /shared/scan.db
         """
     )
     
@@ -29,13 +53,46 @@ Examples:
     scan_parser.add_argument("--output", "-o", help="Output report file")
     scan_parser.add_argument("--provider", "-p", choices=["ollama", "openai", "all"], default="ollama", help="AI provider to test")
     scan_parser.add_argument("--fast", action="store_true", help="Fast scan (limited payloads)")
+    scan_parser.add_argument("--model", "-m", action="append", default=[], help="provider:model lane for openai/all scans (repeatable)")
+    scan_parser.add_argument("--concurrency", type=int, help="Test all payloads with up to N requests in flight (async mode)")
+    scan_parser.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout in seconds")
+    scan_parser.add_argument("--no-cache", action="store_true", help="Do not read or write the response cache")
+    scan_parser.add_argument("--refresh", action="store_true", help="Re-query every payload and overwrite cached responses")
+    scan_parser.add_argument("--stream", action="store_true", help="Stream responses and stop generation once the verdict is final")
+    scan_parser.add_argument("--canary", action="append", default=[], help="Canary token whose appearance in a response is a leak (repeatable)")
+    scan_parser.add_argument("--prefix-reuse", choices=["ollama", "llamacpp"], help="Reuse the server's cached system-prompt prefix")
+    scan_parser.add_argument("--server-url", help="Model server base URL for --prefix-reuse")
+    scan_parser.add_argument("--benchmark-prefix", action="store_true", help="Time every payload with and without prefix reuse, then exit")
+    scan_parser.add_argument("--resume", action="store_true", help="Resume an interrupted scan from its journal")
+    scan_parser.add_argument("--journal", default=".cache/scan_journal.jsonl", help="Checkpoint journal location")
+    scan_parser.add_argument("--cache-path", default=".cache/responses.sqlite", help="Response cache location")
+    scan_parser.add_argument("--live", action="store_true", help="Use real Ollama verdicts instead of simulated demo findings")
+    scan_parser.add_argument("--bandit", action="store_true", help="Order payloads by Thompson sampling over past success rates")
+    scan_parser.add_argument("--bandit-stats", default=".cache/bandit_stats.json", help="Success statistics kept across runs")
+    scan_parser.add_argument("--budget", type=int, help="Test at most N payloads per model")
+    scan_parser.add_argument("--cluster", action="store_true", help="Test one payload per near-duplicate cluster; expand clusters whose representative succeeds")
+    scan_parser.add_argument("--fuzz", type=int, metavar="GENERATIONS", help="Evolve payloads for N generations, scored by the target's verdicts")
+    scan_parser.add_argument("--population", type=int, default=20, help="Fuzzer population size per generation")
+    scan_parser.add_argument("--seed", type=int, help="Seed for the fuzzer")
+    scan_parser.add_argument("--dedup", action="store_true", help="Skip payloads seen in earlier runs (persistent index)")
+    scan_parser.add_argument("--dedup-index", default=".cache/payload_index.sqlite", help="Dedup index location")
+    scan_parser.add_argument("--bloom", action="store_true", help="Put a Bloom filter in front of the dedup index")
     
     # Generate command
     gen_parser = subparsers.add_parser("generate", help="Generate attack payloads")
     gen_parser.add_argument("--count", "-c", type=int, default=10, help="Number of payloads to generate")
     gen_parser.add_argument("--target-prompt", help="Target prompt for custom payloads")
+    gen_parser.add_argument("--targets-file", help="File of system prompts, one per line; generates --count payloads for each")
     gen_parser.add_argument("--save", "-s", action="store_true", help="Save to file")
     gen_parser.add_argument("--creativity", choices=["low", "medium", "high"], default="medium", help="Creativity level")
+    gen_parser.add_argument("--seed", type=int, help="Seed for a reproducible payload order")
+    gen_parser.add_argument("--shards", type=int, help="Write a sharded corpus with N shard files and a manifest")
+    gen_parser.add_argument("--workers", type=int, help="Worker processes for sharded generation (default: CPU count)")
+    gen_parser.add_argument("--compress", action="store_true", help="Gzip shard files")
+    gen_parser.add_argument("--output-dir", help="Directory for shard files (default: data/payloads/generated_<timestamp>)")
+    gen_parser.add_argument("--dedup", action="store_true", help="Skip payloads seen in earlier runs (persistent index)")
+    gen_parser.add_argument("--dedup-index", default=".cache/payload_index.sqlite", help="Dedup index location")
+    gen_parser.add_argument("--bloom", action="store_true", help="Put a Bloom filter in front of the dedup index")
     
     # Test command
     test_parser = subparsers.add_parser("test", help="Test specific provider")
@@ -43,6 +100,48 @@ Examples:
     test_parser.add_argument("--model", "-m", help="Model to test")
     test_parser.add_argument("--prompt", help="Custom system prompt")
     
+    # Distributed mode
+    coord_parser = subparsers.add_parser("coordinate", help="Queue a scan matrix for distributed workers")
+    coord_parser.add_argument("--queue", "-q", required=True, help="Shared SQLite queue file")
+    coord_parser.add_argument("--target", "-t", action="append", default=[], help="System prompt to test (repeatable)")
+    coord_parser.add_argument("--model", "-m", action="append", default=[], help="provider:model pair, e.g. ollama:llama2 (repeatable)")
+    coord_parser.add_argument("--payloads", "-p", help="Payload file (default: generate)")
+    coord_parser.add_argument("--count", "-c", type=int, default=100, help="Payloads to generate when no file is given")
+    coord_parser.add_argument("--chunk-size", type=int, default=20, help="Payloads per work unit")
+    coord_parser.add_argument("--wait", action="store_true", help="Wait for workers and write the merged report")
+    coord_parser.add_argument("--output", "-o", help="Merged report file")
+    coord_parser.add_argument("--dedup", action="store_true", help="Only queue payloads never seen in earlier runs")
+    coord_parser.add_argument("--dedup-index", default=".cache/payload_index.sqlite", help="Dedup index location")
+    coord_parser.add_argument("--bloom", action="store_true", help="Put a Bloom filter in front of the dedup index")
+    
+    worker_parser = subparsers.add_parser("worker", help="Process units from a shared queue")
+    worker_parser.add_argument("--queue", "-q", required=True, help="Shared SQLite queue file")
+    worker_parser.add_argument("--id", help="Worker id (default: host-pid-random)")
+    worker_parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight per unit")
+    worker_parser.add_argument("--idle-timeout", type=float, default=0.0, help="Seconds to wait for new units before exiting")
+    
+    # Library command
+    lib_parser = subparsers.add_parser("library", help="Build or query a memory-mapped payload library")
+    lib_parser.add_argument("action", choices=["build", "query", "stats"], help="What to do with the library")
+    lib_parser.add_argument("--library", "-l", default="data/payloads/library.plib", help="Library file")
+    lib_parser.add_argument("--input", "-i", action="append", default=[], help="Payload file to build from (repeatable, default: data/payloads/*.txt)")
+    lib_parser.add_argument("--generate", type=int, help="Also add N payloads from the generator, with their transforms")
+    lib_parser.add_argument("--technique", action="append", help="Only payloads of this technique (repeatable)")
+    lib_parser.add_argument("--severity", action="append", help="Only payloads of this severity (repeatable)")
+    lib_parser.add_argument("--source", action="append", help="Only payloads from this source (repeatable)")
+    lib_parser.add_argument("--obfuscated", action="store_true", help="Only obfuscated payloads")
+    lib_parser.add_argument("--unseen-days", type=float, help="Skip payloads tested in the last N days")
+    lib_parser.add_argument("--limit", type=int, default=20, help="Payloads to print")
+    
+    # Rescore command
+    rescore_parser = subparsers.add_parser("rescore", help="Re-score a scan journal's results with the vectorized evaluator")
+    rescore_parser.add_argument("--journal", default=".cache/scan_journal.jsonl", help="Scan journal to re-score")
+    rescore_parser.add_argument("--features", default=".cache/verdict_features.npy", help="Feature matrix store for the journal")
+    rescore_parser.add_argument("--rebuild", action="store_true", help="Re-extract features even if the store is current")
+    rescore_parser.add_argument("--weights", help="Evaluator weights file (JSON)")
+    rescore_parser.add_argument("--fit", action="store_true", help="Fit weights to the journal's recorded verdicts")
+    rescore_parser.add_argument("--save-weights", help="Write the evaluator weights to this file")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -57,6 +156,14 @@ Examples:
         run_generate(dash, args)
     elif args.command == "test":
         run_test(dash, args)
+    elif args.command == "coordinate":
+        run_coordinate(dash, args)
+    elif args.command == "worker":
+        run_worker(dash, args)
+    elif args.command == "library":
+        run_library(dash, args)
+    elif args.command == "rescore":
+        run_rescore(dash, args)
 
 def run_scan(dash, args):
     """Run a security scan"""
@@ -69,22 +176,124 @@ def run_scan(dash, args):
     else:
         target = "You are a helpful AI assistant that follows ethical guidelines."
     
+    ollama_lane = (args.provider == "ollama" or any(m.startswith("ollama:") for m in args.model)
+                   or (args.provider == "all" and not args.model))
+    if args.fuzz and ollama_lane and not args.live:
+        dash.print_status("--fuzz needs --live: simulated Ollama verdicts would steer the fuzzer", "error")
+        return
+    
     # Show live scan view
     dash.live_scan_view(target, payload_count=25 if args.fast else 50)
     
-    # Generate payloads
-    dash.print_status("Generating attack payloads...", "info")
-    generator = PayloadGenerator()
-    payloads = generator.generate(count=15 if args.fast else 30)
+    journal = ScanJournal(args.journal, resume=args.resume)
+    # Payloads are only marked seen once tested (below), not when generated
+    dedup = open_dedup(args)
+    
+    if args.resume and journal.plan and journal.plan.get("target") == target:
+        payloads = journal.plan["payloads"]
+        dash.print_status(f"Resuming scan: {len(journal)} units already completed", "info")
+    else:
+        # Generate payloads
+        dash.print_status("Generating attack payloads...", "info")
+        generator = PayloadGenerator(dedup=dedup, record=False)
+        payloads = generator.generate(count=15 if args.fast else 30)
+        journal.set_plan(target=target, payloads=payloads)
     
     # Test payloads
     dash.print_status(f"Testing against {args.provider}...", "scan")
-    tester = RealAITester()
+    cache = ResponseCache(args.cache_path, enabled=not args.no_cache, refresh=args.refresh)
+    bandit = PayloadBandit(args.bandit_stats) if args.bandit else None
+    tester = RealAITester(cache=cache, stream=args.stream, canaries=args.canary, journal=journal, bandit=bandit,
+                          demo_mode=not args.live)
+    if bandit is not None and tester.demo_mode and ollama_lane:
+        dash.print_status("Ollama verdicts are simulated without --live; the bandit learns from OpenAI lanes only", "warning")
+    if args.prefix_reuse:
+        tester.prefix = PrefixReuse(tester.transport, backend=args.prefix_reuse, base_url=args.server_url)
+    
+    if args.benchmark_prefix:
+        if dedup is not None:
+            dedup.close()
+        model = next((m.split(":", 1)[1] for m in args.model if m.startswith("ollama:")), "llama2")
+        dash.print_status(f"Benchmarking prefix reuse on {model}...", "scan")
+        try:
+            latencies = tester.benchmark_prefix_reuse(
+                target, payloads[:args.budget] if args.budget else payloads, model, timeout=max(args.timeout, 60.0)
+            )
+        except Exception as e:
+            dash.print_status(str(e), "error")
+            return
+        for mode, latency in latencies.items():
+            dash.print_status(
+                f"Latency ({mode}): mean {latency['mean_ms']}ms, p50 {latency['p50_ms']}ms, "
+                f"p95 {latency['p95_ms']}ms over {latency['count']} requests", "info"
+            )
+        return
+    
+    fanout = None
+    if args.provider == "ollama":
+        def run_payloads(batch):
+            return tester.test_local_ollama(
+                target, batch,
+                limit=args.budget or (None if args.concurrency or args.fuzz or args.cluster else 5),
+                concurrency=args.concurrency,
+                timeout=args.timeout
+            )
+    else:
+        lanes = [tuple(m.split(":", 1)) for m in args.model if ":" in m]
+        if not lanes:
+            lanes = [("openai", "gpt-3.5-turbo")]
+            if args.provider == "all":
+                lanes.insert(0, ("ollama", "llama2"))
+        
+        exploiter = AIExploiter(cache=cache, stream=args.stream, canaries=args.canary, bandit=bandit,
+                                journal=journal)
+        fanout = ProviderFanout(
+            lanes, tester=tester, exploiter=exploiter,
+            concurrency={provider: args.concurrency for provider, _ in lanes} if args.concurrency else None,
+            on_result=dash.print_live_result,
+            timeout=args.timeout,
+            bandit=bandit, budget=args.budget
+        )
+        
+        def run_payloads(batch):
+            return fanout.run(target, batch)
     
-    if args.provider in ["ollama", "all"]:
-        results = tester.test_local_ollama(target, payloads)
+    if args.fuzz:
+        fuzzer = EvolutionaryFuzzer(population=args.population, seed=args.seed)
+        results, fuzz_stats = fuzzer.run(run_payloads, generations=args.fuzz, initial=payloads)
+        payloads = list(dict.fromkeys(r.get("payload") for r in results))
+        dash.print_status(
+            f"Fuzzer: {fuzz_stats['tested']} payloads over {fuzz_stats['generations']} generations, "
+            f"{fuzz_stats['vulnerable']} vulnerable, {fuzz_stats['cache_hits']} fitness cache hits", "info"
+        )
+        for best in fuzz_stats["best"]:
+            dash.print_status(f"  {best['fitness']:.2f}  {best['payload'][:70]}", "info")
+    elif args.cluster:
+        results, cluster_stats = scan_by_cluster(payloads, run_payloads)
+        dash.print_status(
+            f"Clusters: {cluster_stats['clusters']} for {cluster_stats['payloads']} payloads, "
+            f"{cluster_stats['representatives_hit']} representatives hit, "
+            f"{cluster_stats['skipped']} payloads skipped", "info"
+        )
     else:
-        results = []
+        results = run_payloads(payloads)
+    
+    if dedup is not None:
+        dedup.add_many(recordable_payloads(results), source="scan")
+        report_dedup(dash, dedup)
+    
+    if fanout is not None:
+        for lane, lane_stats in fanout.lane_stats.items():
+            dash.print_status(
+                f"{lane}: {lane_stats['completed']} done, {lane_stats['errors']} errors in {lane_stats['seconds']}s", "info"
+            )
+    
+    if bandit is not None:
+        bandit.save()
+        techniques = bandit.stats()["techniques"]
+        dash.print_status(
+            "Bandit: " + ", ".join(f"{t} {v['successes']}/{v['trials']}" for t, v in techniques.items()), "info"
+        )
     
     # Generate stats
     stats = {
@@ -100,16 +309,81 @@ def run_scan(dash, args):
     # Show results
     dash.show_results(results, stats)
     
+    transport = tester.transport.metrics()
+    dash.print_status(
+        f"HTTP: {transport['requests']} requests over {transport['connections_opened']} connections "
+        f"(reuse {transport['reuse_ratio']:.0%})", "info"
+    )
+    
+    for mode, latency in tester.latency_stats().items():
+        if latency["count"]:
+            dash.print_status(
+                f"Latency ({mode}): mean {latency['mean_ms']}ms, p50 {latency['p50_ms']}ms, "
+                f"p95 {latency['p95_ms']}ms over {latency['count']} requests", "info"
+            )
+    
+    if args.stream:
+        stream_stats = tester.stream_stats
+        dash.print_status(
+            f"Streaming: {stream_stats['early_stops']}/{stream_stats['streams']} generations stopped early", "info"
+        )
+    
+    if cache.enabled:
+        cache_stats = cache.stats()
+        dash.print_status(
+            f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)", "info"
+        )
+    
     # Save report if requested
     if args.output:
-        report_file = tester.save_professional_report(args.output)
+        # Fanout findings include every lane, not just the Ollama tester's
+        report_file = tester.save_professional_report(args.output, results=results)
         dash.print_status(f"Report saved to: {report_file}", "success")
 
+def open_dedup(args):
+    """The persistent payload dedup index if --dedup was given"""
+    if not args.dedup:
+        return None
+    return DedupIndex(args.dedup_index, bloom=args.bloom)
+
+def report_dedup(dash, dedup):
+    if dedup is None:
+        return
+    stats = dedup.stats()
+    dash.print_status(
+        f"Dedup: {stats['skipped']} already-seen payloads skipped, {stats['added']} new "
+        f"({stats['indexed']} indexed)", "info"
+    )
+    dedup.close()
+
 def run_generate(dash, args):
     """Generate payloads"""
     dash.print_header("PAYLOAD GENERATOR")
     
-    generator = PayloadGenerator(creativity_level=args.creativity)
+    dedup = None if args.shards else open_dedup(args)
+    if args.dedup and args.shards:
+        dash.print_status("--dedup is not applied to sharded output", "warning")
+    # Generated payloads are not tested here, so they are not marked seen
+    generator = PayloadGenerator(creativity_level=args.creativity, seed=args.seed, dedup=dedup, record=False)
+    dash.print_status(f"Payload space: {generator.grammar.size} distinct payloads (seed {generator.seed})", "info")
+    if args.count > generator.grammar.size and not (args.target_prompt or args.targets_file):
+        dash.print_status(f"--count {args.count} exceeds the payload space; generating {generator.grammar.size}", "warning")
+        args.count = generator.grammar.size
+    
+    if args.shards:
+        manifest = generate_sharded(
+            args.count, output_dir=args.output_dir, shards=args.shards, workers=args.workers,
+            compress=args.compress, seed=generator.seed, creativity_level=args.creativity,
+            grammar=generator.grammar
+        )
+        dash.print_status(f"Manifest: {manifest['path']}", "success")
+        return
+    
+    if args.targets_file:
+        run_generate_targets(dash, args, generator)
+        report_dedup(dash, dedup)
+        return
     
     if args.target_prompt:
         dash.print_status(f"Generating targeted payloads...", "info")
@@ -128,11 +402,122 @@ def run_generate(dash, args):
     
     print("\n" + "─" * 80)
     print(f" Total: {len(payloads)} payloads generated")
+    report_dedup(dash, dedup)
     
     if args.save:
         filename = generator.save_payloads(payloads)
         dash.print_status(f"Saved to: {filename}", "success")
 
+def run_generate_targets(dash, args, generator):
+    """Targeted payloads for every prompt in --targets-file, streamed as JSON lines"""
+    with open(args.targets_file, 'r') as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    
+    dash.print_status(f"Generating {args.count} targeted payloads for each of {len(prompts)} prompts...", "info")
+    stream = generator.generate_for_targets(prompts, args.count)
+    
+    if not args.save:
+        for index, payloads in stream:
+            print(f"\n[{index + 1}] {prompts[index][:70]}")
+            for payload in payloads:
+                print(f"     {payload}")
+        return
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    filename = f"data/payloads/targeted_{timestamp}.jsonl"
+    saved = 0
+    with open(filename, 'w', buffering=1 << 20) as f:
+        for index, payloads in stream:
+            for payload in payloads:
+                f.write(json.dumps({"target": index, "payload": payload}) + "\n")
+            saved += len(payloads)
+    dash.print_status(f"Saved {saved} payloads for {len(prompts)} prompts to: {filename}", "success")
+
+def run_library(dash, args):
+    """Build, query or summarize a payload library"""
+    if args.action == "build":
+        files = args.input or sorted(glob.glob("data/payloads/*.txt"))
+        
+        entries = PayloadLibrary.file_entries(files)
+        if args.generate:
+            generator = PayloadGenerator(creativity_level="high")
+            generated = generator.iter_payloads(args.generate, with_transforms=True)
+            entries = chain(entries, ((payload, transforms, "generator") for payload, transforms in generated))
+        
+        info = PayloadLibrary.build(args.library, entries)
+        dash.print_status(f"Built {args.library}: {info['payloads']} payloads, {len(info['tags'])} tags", "success")
+        return
+    
+    if not os.path.exists(args.library):
+        dash.print_status(f"No library at {args.library}; run 'library build' first", "error")
+        return
+    
+    with PayloadLibrary(args.library) as library:
+        if args.action == "stats":
+            dash.print_status(f"{args.library}: {len(library)} payloads", "info")
+            for tag, count in library.tag_counts().items():
+                print(f"    {tag:<40} {count:>8}")
+            return
+        
+        filters = {
+            "technique": args.technique,
+            "severity": args.severity,
+            "source": args.source,
+            "obfuscated": True if args.obfuscated else None,
+            "not_seen_since": time.time() - args.unseen_days * 86400 if args.unseen_days else None
+        }
+        for i, payload in enumerate(library.query(limit=args.limit, **filters), 1):
+            print(f"{i:3d}. {payload}")
+
+def run_rescore(dash, args):
+    """Re-score every result in a scan journal in one vectorized pass"""
+    try:
+        from src.core.evaluator import (VerdictEvaluator, build_feature_store, journal_pairs, labels_path,
+                                        load_feature_store, load_labels)
+        import numpy as np
+        evaluator = VerdictEvaluator.load(args.weights) if args.weights else VerdictEvaluator()
+    except ImportError as e:
+        dash.print_status(str(e), "error")
+        return
+    
+    if not os.path.exists(args.journal):
+        dash.print_status(f"No journal at {args.journal}", "error")
+        return
+    
+    started = time.perf_counter()
+    stale = (not os.path.exists(args.features) or not os.path.exists(labels_path(args.features))
+             or os.path.getmtime(args.features) < os.path.getmtime(args.journal))
+    if args.rebuild or stale:
+        rows = build_feature_store(evaluator, journal_pairs(args.journal), args.features)
+        dash.print_status(f"Extracted features for {rows} results in {time.perf_counter() - started:.2f}s", "info")
+    X = load_feature_store(args.features)
+    recorded = load_labels(args.features)
+    
+    if args.fit:
+        evaluator.fit(X, recorded)
+    if args.save_weights:
+        evaluator.save(args.save_weights)
+        dash.print_status(f"Weights saved to: {args.save_weights}", "success")
+    
+    started = time.perf_counter()
+    vulnerable = changed = 0
+    severities = {}
+    position = 0
+    for verdict, severity, _ in evaluator.score_chunks(X):
+        vulnerable += int(np.count_nonzero(verdict))
+        changed += int(np.count_nonzero(verdict != recorded[position:position + len(verdict)]))
+        levels, counts = np.unique(severity[verdict], return_counts=True)
+        for level, count in zip(levels.tolist(), counts.tolist()):
+            severities[level] = severities.get(level, 0) + count
+        position += len(verdict)
+    
+    dash.print_status(
+        f"Re-scored {len(X)} results in {time.perf_counter() - started:.2f}s: {vulnerable} vulnerable "
+        f"(journal: {int(np.count_nonzero(recorded))}), {changed} verdicts changed", "info"
+    )
+    for level in sorted(severities, key=SEVERITY_ORDER.get, reverse=True):
+        print(f"    {level:<10} {severities[level]:>10}")
+
 def run_test(dash, args):
     """Test specific provider"""
     dash.print_header(f"TESTING {args.provider.upper()}")
@@ -171,5 +556,67 @@ def run_test(dash, args):
             icon = "🔴" if result.get("severity") == "critical" else "🟡"
             print(f"{icon} {result['payload'][:60]}...")
 
+def run_coordinate(dash, args):
+    """Split a scan matrix into leases on the shared queue"""
+    dash.print_header("SCAN COORDINATOR")
+    
+    queue = WorkQueue(args.queue)
+    targets = args.target or ["You are a helpful AI assistant that follows ethical guidelines."]
+    providers = [tuple(m.split(":", 1)) if ":" in m else ("ollama", m) for m in args.model] or [("ollama", "llama2")]
+    
+    # Queued payloads are only marked seen once their results are merged
+    dedup = open_dedup(args)
+    if args.payloads:
+        payloads = load_payloads(args.payloads, dedup=dedup, record=False)
+    else:
+        payloads = PayloadGenerator(dedup=dedup, record=False).generate(args.count)
+    report_dedup(dash, dedup)
+    
+    units = queue.submit_matrix(targets, providers, payloads, chunk_size=args.chunk_size)
+    dash.print_status(f"Queued {units} units ({len(targets)} targets x {len(providers)} models x {len(payloads)} payloads)", "success")
+    
+    if not args.wait:
+        if args.dedup:
+            dash.print_status("Payloads are added to the dedup index only with --wait", "warning")
+        return
+    
+    while True:
+        progress = queue.progress()
+        dash.print_status(
+            f"pending {progress['pending']} | leased {progress['leased']} | "
+            f"done {progress['done']} | failed {progress['failed']}", "scan"
+        )
+        if progress["pending"] == 0 and progress["leased"] == 0:
+            break
+        queue.requeue_expired()
+        time.sleep(5)
+    
+    tester = merge_results(queue)
+    dedup = open_dedup(args)
+    if dedup is not None:
+        added = dedup.add_many(recordable_payloads(tester.results), source="coordinate")
+        dash.print_status(f"Dedup: {added} tested payloads added to the index", "info")
+        dedup.close()
+    
+    report = tester.generate_findings_report()
+    dash.print_status(
+        f"{report['executive_summary']['total_tests']} tests, "
+        f"{report['executive_summary']['vulnerabilities_found']} vulnerabilities "
+        f"(risk: {report['executive_summary']['overall_risk']})", "info"
+    )
+    
+    if args.output:
+        report_file = tester.save_professional_report(args.output)
+        dash.print_status(f"Report saved to: {report_file}", "success")
+
+def run_worker(dash, args):
+    """Pull and execute units from the shared queue"""
+    dash.print_status(f"Worker attached to {args.queue}", "info")
+    
+    worker = ScanWorker(WorkQueue(args.queue), worker_id=args.id, concurrency=args.concurrency)
+    done = worker.run(idle_timeout=args.idle_timeout)
+    
+    dash.print_status(f"Worker finished {done} units", "success")
+
 if __name__ == "__main__":
     main()
@@ -2,28 +2,90 @@
 import argparse
 import sys
 import json
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
-def execute_attack(target, payload_file, api_key=None, model="gpt-4"):
+from src.attacks.dedup import DedupIndex
+from src.attacks.payloads import PayloadLibrary, load_payloads
+from src.core.journal import ScanJournal
+
+def _batches(items, size=256):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+def execute_attack(target, payload_file, api_key=None, model="gpt-4", journal=None, dedup=None,
+                   filters=None, limit=50):
     print(f"[*] Testing: {target[:60]}...")
     
     results = []
-    with open(payload_file, 'r') as f:
-        payloads = [line.strip() for line in f if line.strip()]
+    library = None
+    if PayloadLibrary.is_library(payload_file):
+        # Matching ids are streamed and decoded a batch at a time, so only
+        # about what gets tested is read from the library
+        library = PayloadLibrary(payload_file, writable=True)
+        batches = ([(library[i], i) for i in ids] for ids in _batches(library.ids(**(filters or {}))))
+        total = limit
+        print(f"[*] Testing up to {limit} matching payloads from library ({len(library)} total)")
+    else:
+        payloads = load_payloads(payload_file)
+        batches = _batches((payload, None) for payload in payloads)
+        total = min(limit, len(payloads))
     
-    for i, payload in enumerate(payloads[:50]):
-        print(f"[{i+1}/{len(payloads)}] {payload[:40]}...")
+    skipped = 0
+    for batch in batches:
+        if dedup is not None:
+            # Payloads finished in the journal stay in, so a resumed run still reports them
+            fresh = set(dedup.unseen(payload for payload, _ in batch))
+            kept = [(p, i) for p, i in batch
+                    if p in fresh or (journal is not None and journal.get(target, "simulated", model, p))]
+            skipped += len(batch) - len(kept)
+            batch = kept
         
-        simulated_response = f"Test response to: {payload}"
-        success = "ignore" in payload.lower() or "override" in payload.lower()
+        tested_ids = []
+        for payload, library_id in batch[:limit - len(results)]:
+            tested_ids.append(library_id)
+            n = len(results) + 1
+            
+            if journal is not None:
+                done = journal.get(target, "simulated", model, payload)
+                if done:
+                    print(f"[{n}/{total}] Already done: {payload[:40]}...")
+                    results.append(done)
+                    continue
+            
+            print(f"[{n}/{total}] {payload[:40]}...")
+            
+            simulated_response = f"Test response to: {payload}"
+            success = "ignore" in payload.lower() or "override" in payload.lower()
+            
+            result = {
+                "payload": payload,
+                "response": simulated_response,
+                "success": success,
+                "confidence": 0.85 if success else 0.15
+            }
+            results.append(result)
+            
+            if journal is not None:
+                journal.record(target, "simulated", model, payload, result)
+            if dedup is not None:
+                dedup.add(payload, source=payload_file)
         
-        results.append({
-            "payload": payload,
-            "response": simulated_response,
-            "success": success,
-            "confidence": 0.85 if success else 0.15
-        })
+        if library is not None:
+            library.mark_seen(tested_ids)
+        if len(results) >= limit:
+            break
+    
+    if dedup is not None:
+        print(f"[*] Skipped {skipped} payloads already tested in earlier runs")
+    if library is not None:
+        library.close()
     
     return results
 
@@ -60,10 +122,17 @@ def save_report(results, target, output_dir):
 def main():
     parser = argparse.ArgumentParser(description="Tiny Injection - AI Security Scanner")
     parser.add_argument("--target", "-t", required=True, help="System prompt to test")
-    parser.add_argument("--payloads", "-p", default="data/payloads/basic.txt", help="Payload file")
+    parser.add_argument("--payloads", "-p", default="data/payloads/basic.txt", help="Payload file or library (.plib)")
     parser.add_argument("--output", "-o", default="reports", help="Output directory")
     parser.add_argument("--model", "-m", default="gpt-4", help="Model to test against")
     parser.add_argument("--api-key", "-k", help="API key for target model")
+    parser.add_argument("--resume", action="store_true", help="Skip payloads already completed in the journal")
+    parser.add_argument("--journal", help="Checkpoint journal (default: <output>/journal.jsonl)")
+    parser.add_argument("--technique", action="append", help="Library only: payload technique to test (repeatable)")
+    parser.add_argument("--obfuscated", action="store_true", help="Library only: obfuscated payloads only")
+    parser.add_argument("--unseen-days", type=float, help="Library only: skip payloads tested in the last N days")
+    parser.add_argument("--dedup", action="store_true", help="Skip payloads tested in earlier runs")
+    parser.add_argument("--dedup-index", default=".cache/payload_index.sqlite", help="Dedup index location")
     
     args = parser.parse_args()
     
@@ -74,7 +143,18 @@ def main():
     ╚══════════════════════════════════╝
     """)
     
-    results = execute_attack(args.target, args.payloads, args.api_key, args.model)
+    journal = ScanJournal(args.journal or str(Path(args.output) / "journal.jsonl"), resume=args.resume)
+    dedup = DedupIndex(args.dedup_index) if args.dedup else None
+    filters = {
+        "technique": args.technique,
+        "obfuscated": True if args.obfuscated else None,
+        "not_seen_since": time.time() - args.unseen_days * 86400 if args.unseen_days else None
+    }
+    results = execute_attack(args.target, args.payloads, args.api_key, args.model, journal=journal, dedup=dedup,
+                             filters=filters)
+    journal.close()
+    if dedup is not None:
+        dedup.close()
     save_report(results, args.target, args.output)
 
 if __name__ == "__main__":